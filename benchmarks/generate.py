@@ -0,0 +1,55 @@
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from models.level_curve import LEVEL_CURVE
+from models.rollups import Rollups
+from models.study_log import StudyLog
+from utils.config import SUBJECTS
+
+
+def generate_history(sessions, seed=0, start=datetime(2020, 1, 1), years=5):
+    """sessions 件の学習記録を持つ study_data.json の内容を作成
+
+    記録は start から years 年の期間に日時順で散らばり、
+    科目・時間（15〜180分）・時刻（6〜23時）は seed から決まる乱数で選ぶ。
+    """
+    rng = random.Random(seed)
+    subjects = list(SUBJECTS.items())
+    period = years * 365 * 24 * 60  # 分
+    offsets = sorted(rng.randrange(period) for _ in range(sessions))
+
+    rows = []
+    total_exp = 0.0
+    for record_id, offset in enumerate(offsets, 1):
+        day, minute = divmod(offset, 24 * 60)
+        # 深夜の記録は朝〜夜の時間帯に寄せる
+        minute = 6 * 60 + minute * 18 // 24
+        subject, info = rng.choice(subjects)
+        minutes = rng.randint(15, 180)
+        exp = minutes * info["difficulty"]
+        total_exp += exp
+        studied_at = start + timedelta(days=day, minutes=minute)
+        rows.append([record_id, minutes, subject, exp, studied_at.strftime('%Y-%m-%d %H:%M')])
+
+    level, exp, tickets = LEVEL_CURVE.resolve(total_exp)
+    return {
+        'exp': exp,
+        'level': level,
+        'tickets': tickets,
+        'study_log': rows,
+        'rollups': Rollups.from_log(StudyLog(rows)).to_dict()
+    }
+
+
+def write_history(data_file, sessions, seed=0):
+    with open(data_file, 'w') as f:
+        json.dump(generate_history(sessions, seed), f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python -m benchmarks.generate study_data.json 10000 [seed]")
+        sys.exit(1)
+    write_history(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) == 4 else 0)
+    print(f"{sys.argv[2]}件の記録を作成しました")
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from models.storage import create_storage
+from models.migrate import migrate_json_to_sqlite
+from models.rollups import to_date
+from models.study_tracker import StudyTracker
+from utils.config import STORAGE_CONFIG, SUBJECTS
+from .generate import write_history
+
+SIZES = [1000, 10000, 100000, 1000000]
+TARGET_HOURS = [100, 500, 1000, 2000, 5000]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(func, repeat, setup=None):
+    """func を repeat 回実行した所要時間（秒）の最小値・中央値"""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {'min': min(runs), 'median': statistics.median(runs), 'runs': repeat}
+
+
+def bench_startup(repeat):
+    """新しいプロセスでメインウィンドウのモジュールを読み込む時間"""
+    code = "import views.app"
+    return {
+        'import_views_app': measure(
+            lambda: subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True), repeat),
+        'import_stats_views': measure(
+            lambda: subprocess.run([sys.executable, "-c", code + "\n" + "".join(
+                f"import views.stats.{name}\n" for name in (
+                    'status_view', 'subject_view', 'daily_view',
+                    'management_view', 'analysis_view'))],
+                cwd=ROOT, check=True), repeat)
+    }
+
+
+def open_tracker(data_file, backend):
+    if backend == 'sqlite':
+        data_file = os.path.splitext(data_file)[0] + '.db'
+    return StudyTracker(data_file, storage=create_storage(
+        data_file, backend, STORAGE_CONFIG["compact_every"]))
+
+
+def bench_tracker(data_file, backend, repeat):
+    results = {'load_data': measure(lambda: open_tracker(data_file, backend), repeat)}
+    tracker = open_tracker(data_file, backend)
+
+    subject = next(iter(SUBJECTS))
+    difficulty = SUBJECTS[subject]["difficulty"]
+    results['add_study'] = measure(
+        lambda: tracker.add_study(30, subject, difficulty), repeat)
+    results['recalculate_stats'] = measure(
+        lambda: tracker.recalculate_stats(skip_save=True), repeat)
+    results['save_data'] = measure(tracker.save_data, repeat)
+
+    # 記録のある古い日から順に消していく
+    days = iter(sorted(tracker.rollups.days))
+    results['reset_day'] = measure(
+        lambda: tracker.reset_day(to_date(next(days)).isoformat()), repeat)
+    return tracker, results
+
+
+def bench_analytics(tracker, repeat):
+    from utils import analytics
+
+    study_log = tracker.study_log
+    cold = study_log.cache.clear  # 版ごとのキャッシュを捨てて毎回作り直す
+    df = analytics.prepare_study_data(study_log)
+    model, _ = analytics.create_prediction_model(df)
+    return {
+        'time_columns': measure(tracker.time_columns, repeat, setup=cold),
+        'prepare_study_data': measure(
+            lambda: analytics.prepare_study_data(study_log), repeat, setup=cold),
+        'create_prediction_model': measure(
+            lambda: analytics.create_prediction_model(df), repeat),
+        'predict_achievement_dates': measure(
+            lambda: analytics.predict_achievement_dates(model, study_log, TARGET_HOURS),
+            repeat, setup=cold),
+        'predict_total_achievement': measure(
+            lambda: analytics.predict_total_achievement(study_log, TARGET_HOURS),
+            repeat, setup=cold),
+        'predict_subject_achievement': measure(
+            lambda: [analytics.predict_subject_achievement(study_log, subject, TARGET_HOURS)
+                     for subject in SUBJECTS], repeat, setup=cold),
+        'time_histograms': measure(
+            lambda: analytics.time_histograms(tracker.time_columns()), repeat, setup=cold)
+    }
+
+
+def bench_charts(tracker, repeat):
+    """分析タブのグラフ作成とラスタライズ（Aggのみ、Tk不要）"""
+    from views.chart_renderer import ChartRenderer
+    from views.stats.analysis_view import AnalysisView
+
+    # Tkのウィジェットを作らずに描画メソッドだけを使う
+    view = AnalysisView.__new__(AnalysisView)
+    view.tracker = tracker
+    renderer = ChartRenderer()
+    rollups = tracker.rollups
+    progress = (rollups.last('days', 7), rollups.last('weeks', 8), rollups.last('months', 12))
+
+    def rasterize(draw):
+        renderer.rasterize(draw, None)
+        label, fig, image, error = renderer.results.get()
+        if error is not None:
+            raise error
+
+    return {
+        'progress_graph': measure(
+            lambda: rasterize(lambda: view.draw_progress_graph(*progress)), repeat),
+        'time_analysis': measure(
+            lambda: rasterize(lambda: view.draw_time_analysis(tracker.time_columns())),
+            repeat, setup=tracker.study_log.cache.clear)
+    }
+
+
+def bench_views(tracker, repeat):
+    """各統計ビューの作成時間（画面がない環境では skipped）"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'skipped': str(e)}
+    root.withdraw()
+
+    from views.app import StudyApp
+    results = {}
+    try:
+        for view_id, module_name, class_name, tab_name in StudyApp.STATS_VIEWS:
+            view_class = StudyApp.load_stats_view(module_name, class_name)
+            frames = []
+
+            def build():
+                frame = tk.Frame(root)
+                frames.append(frame)
+                view_class(frame, tracker)
+                root.update_idletasks()
+
+            results[view_id] = measure(build, repeat)
+            for frame in frames:
+                frame.destroy()
+    finally:
+        root.destroy()
+    return results
+
+
+def run(sizes, backend, repeat, skip_views=False):
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': backend,
+            'repeat': repeat
+        },
+        'startup': bench_startup(repeat),
+        'sizes': {}
+    }
+    for sessions in sizes:
+        workdir = tempfile.mkdtemp(prefix='studytracker-bench-')
+        try:
+            data_file = os.path.join(workdir, 'study_data.json')
+            write_history(data_file, sessions)
+            if backend == 'sqlite':
+                migrate_json_to_sqlite(data_file, os.path.splitext(data_file)[0] + '.db')
+            tracker, results = bench_tracker(data_file, backend, repeat)
+            results['analytics'] = bench_analytics(tracker, repeat)
+            results['charts'] = bench_charts(tracker, repeat)
+            if not skip_views:
+                results['views'] = bench_views(tracker, repeat)
+            report['sizes'][str(sessions)] = results
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(f"{sessions}件: 完了", file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StudyTracker のベンチマーク")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help="学習記録の件数（既定: 1000 10000 100000 1000000）")
+    parser.add_argument('--backend', default=STORAGE_CONFIG["backend"],
+                        choices=['json', 'journal', 'sqlite'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-views', action='store_true',
+                        help="Tkのビュー作成を計測しない")
+    parser.add_argument('--output', help="JSONレポートの出力先（省略時は標準出力）")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.backend, args.repeat, args.skip_views)
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
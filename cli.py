@@ -0,0 +1,346 @@
+"""GUIを使わずに学習記録の追加・修正や集計を行うコマンドライン版
+
+使い方:
+    python -m cli add 30 English
+    python -m cli add 45 プログラミング --at "2024-05-01 21:00"
+    python -m cli stats --json
+    python -m cli import history.csv   （studied_at, subject, minutes 列）
+    python -m cli batch commands.txt   （1行1コマンド、読み込み・保存は1回だけ）
+    python -m cli --profile 花子 stats  （学習者を指定。省略時はGUIで最後に選んだ学習者）
+    python -m cli profiles --add 花子
+"""
+import argparse
+import gc
+import json
+import shlex
+import sys
+from datetime import datetime
+from models.level_curve import LEVEL_CURVE
+from models.profiles import ProfileIndex
+from models.storage import create_storage
+from models.study_tracker import StudyTracker
+from utils.config import STORAGE_CONFIG, SUBJECTS, PREDICTION_CONFIG
+
+
+class CommandError(Exception):
+    """コマンドの実行に失敗したときのエラー"""
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("1以上の整数を指定してください")
+    return value
+
+
+def parse_time(text, fmt):
+    try:
+        return datetime.strptime(text, fmt).strftime(fmt)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{fmt} の形式で指定してください")
+
+
+def find_record(tracker, record_id):
+    record = tracker.find_record(record_id)
+    if record is None:
+        raise CommandError(f"記録 #{record_id} が見つかりません")
+    return record
+
+
+# コマンド
+def cmd_add(tracker, args):
+    difficulty = SUBJECTS[args.subject]["difficulty"]
+    earned_exp = tracker.add_study(args.minutes, args.subject, difficulty, args.at)
+    print(f"#{tracker.last_id} {args.subject}を{args.minutes}分勉強！ EXP +{earned_exp:.1f} "
+          f"（レベル: {tracker.level}, EXP: {tracker.exp:.1f}, チケット: {tracker.tickets}）")
+
+
+def cmd_edit(tracker, args):
+    record = find_record(tracker, args.id)
+    subject = args.subject or record[2]
+    tracker.modify_record(args.id, args.minutes, subject, SUBJECTS[subject]["difficulty"])
+    print(f"記録 #{args.id} を修正しました")
+
+
+def cmd_delete(tracker, args):
+    find_record(tracker, args.id)
+    tracker.delete_record(args.id)
+    print(f"記録 #{args.id} を削除しました")
+
+
+def cmd_reset_day(tracker, args):
+    tracker.reset_day(args.date)
+    print(f"{args.date}の記録をリセットしました")
+
+
+def collect_stats(tracker, days=None):
+    """ステータスと集計（stats --json・サーバーの /stats と同じ内容）"""
+    total_time, total_exp = tracker.totals()
+    stats = {
+        'level': tracker.level,
+        'exp': tracker.exp,
+        'exp_to_next_level': LEVEL_CURVE.required_exp(tracker.level) - tracker.exp,
+        'tickets': tracker.tickets,
+        'records': len(tracker.study_log),
+        'total_minutes': total_time,
+        'total_exp': total_exp,
+        'subjects': tracker.subject_totals()
+    }
+    if days:
+        stats['daily'] = [{'date': day, 'minutes': minutes, 'exp': exp}
+                          for day, minutes, exp in tracker.daily_totals()[-days:]]
+    return stats
+
+
+def cmd_stats(tracker, args):
+    stats = collect_stats(tracker, args.days)
+    if args.json:
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return
+
+    print(f"現在のレベル: {stats['level']}")
+    print(f"次のレベルまでに必要な経験値: {stats['exp_to_next_level']:.1f} EXP")
+    print(f"残チケット数: {stats['tickets']}枚")
+    print(f"総学習時間: {stats['total_minutes']} 分（{stats['records']}件）")
+    print(f"総獲得経験値: {stats['total_exp']:.1f} EXP")
+    for subject, totals in stats['subjects'].items():
+        print(f"  {subject}: {totals['time']} 分 / {totals['exp']:.1f} EXP")
+    for day in stats.get('daily', []):
+        print(f"  {day['date']}: {day['minutes']} 分 / {day['exp']:.1f} EXP")
+
+
+def cmd_predict(tracker, args):
+    if len(tracker.study_log) < 5:
+        raise CommandError("予測するには最低5件の学習記録が必要です")
+    # pandas は予測するときだけ読み込む
+    from utils.analytics import AnalyticsSession
+    subjects = [args.subject] if args.subject else list(SUBJECTS)
+    predictions = AnalyticsSession.for_log(tracker.study_log).predict_all(
+        subjects, args.targets or PREDICTION_CONFIG["target_hours"])
+    if args.subject:
+        predictions.pop(None)
+    if args.json:
+        print(json.dumps({subject or 'all': dict(days) for subject, days in predictions.items()},
+                         ensure_ascii=False, indent=2))
+        return
+
+    for subject, days in predictions.items():
+        print(f"【{subject or '全データ'}】")
+        for target, needed in days:
+            print(f"{target}時間到達まで: 約{needed}日")
+
+
+def cmd_export(tracker, args):
+    from utils.export import export_records
+    try:
+        count = export_records(tracker.study_log, args.output, args.format,
+                               start=args.start, end=args.end, subjects=args.subject)
+    except (ImportError, ValueError, OSError) as e:
+        raise CommandError(str(e))
+    if args.output:
+        print(f"{count}件の記録を{args.output}へ出力しました")
+
+
+def cmd_import(tracker, args):
+    from utils.importer import read_sessions, SessionError
+    # 数十万行の取り込みでは、増え続けるタプルを循環参照の回収が何度も走査して
+    # 全体の1割以上を占めるため、取り込みの間だけ止める（循環参照は作らない）
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        sessions = read_sessions(args.file, args.format)
+        count = tracker.import_sessions(sessions)
+    except SessionError as e:
+        raise CommandError(f"{args.file}: {e}")
+    except OSError as e:
+        raise CommandError(str(e))
+    finally:
+        if enabled:
+            gc.enable()
+    print(f"{count}件の記録を取り込みました"
+          f"（レベル: {tracker.level}, EXP: {tracker.exp:.1f}, チケット: {tracker.tickets}）")
+
+
+def cmd_batch(tracker, args, parser):
+    """1行1コマンドを順に実行し、最後に1度だけ保存する
+
+    すべての行を解釈してから実行し、途中の行で失敗した場合はどの行の変更も保存しない。
+    """
+    try:
+        f = open(args.file, 'r', encoding='utf-8') if args.file != '-' else sys.stdin
+    except OSError as e:
+        raise CommandError(str(e))
+    commands = []
+    try:
+        for number, line in enumerate(f, 1):
+            try:
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                options = [word for word in words if word.split('=')[0] in TRACKER_OPTIONS]
+                if options:
+                    # 行ごとに別のデータを開くことはできないため、無視せずに断る
+                    raise CommandError(f"{number}行目: {options[0].split('=')[0]} は"
+                                       f"各行ではなく batch の前に指定してください")
+                command = parser.parse_args(words)
+            except (ValueError, SystemExit):
+                raise CommandError(f"{number}行目: コマンドを解釈できません")
+            if command.command == 'batch':
+                raise CommandError(f"{number}行目: batch は入れ子にできません")
+            if command.command == 'profiles':
+                # 学習者の一覧は開いている学習者のデータではなく一覧ファイルを扱う
+                raise CommandError(f"{number}行目: profiles は batch の中では実行できません")
+            commands.append((number, command))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    with tracker.batch():
+        for number, command in commands:
+            try:
+                command.func(tracker, command)
+            except CommandError as e:
+                raise CommandError(f"{number}行目: {e}（どの行の変更も保存していません）")
+
+
+def cmd_profiles(profiles, args):
+    """学習者の一覧（データは読み込まず、一覧ファイルのキャッシュを表示）"""
+    if args.add:
+        try:
+            profiles.create(args.add)
+        except ValueError as e:
+            raise CommandError(str(e))
+        print(f"学習者「{args.add.strip()}」を追加しました")
+        return
+    for name in profiles.names():
+        profile = profiles.profiles[name]
+        mark = '*' if name == profiles.current else ' '
+        summary = ''
+        if 'level' in profile:
+            summary = f"レベル: {profile['level']}, 総学習時間: {profile['total_minutes']} 分"
+        print(f"{mark} {name}  {summary}".rstrip())
+
+
+# add_tracker_arguments() で追加する、読み込むデータの指定
+TRACKER_OPTIONS = ('--data-file', '--profile', '--backend')
+
+
+def add_tracker_arguments(parser):
+    """読み込むデータ（学習者・データファイル・保存方式）の指定"""
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--data-file')
+    target.add_argument('--profile', help="学習者（省略時はGUIで最後に選んだ学習者）")
+    parser.add_argument('--backend', default=STORAGE_CONFIG["backend"],
+                        choices=['json', 'journal', 'sqlite'])
+
+
+def open_tracker(args, profiles, tracker_class=StudyTracker):
+    """add_tracker_arguments() の指定で tracker を開き、(学習者, tracker) を返す
+
+    --data-file を指定した場合、学習者は None。
+    """
+    profile = None
+    data_file = args.data_file
+    if data_file is None:
+        profile = args.profile or profiles.current
+        try:
+            data_file = profiles.data_file(profile)
+        except KeyError:
+            raise CommandError(f"学習者「{profile}」が見つかりません")
+    return profile, tracker_class(data_file, storage=create_storage(
+        data_file, args.backend, STORAGE_CONFIG["compact_every"]))
+
+
+def build_parser(batch_line=False):
+    """コマンドラインの解釈
+
+    batch_line=True は batch ファイルの1行用で、読み込むデータの指定
+    （--profile など）は受け付けない（batch 全体で開いたデータに対して実行するため）。
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m cli" if not batch_line else "batch",
+        description="StudyTracker のコマンドライン版")
+    if not batch_line:
+        add_tracker_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="学習記録を追加")
+    add.add_argument('minutes', type=positive_int)
+    add.add_argument('subject', choices=list(SUBJECTS))
+    add.add_argument('--at', type=lambda text: parse_time(text, '%Y-%m-%d %H:%M'),
+                     help="学習日時（YYYY-MM-DD HH:MM、省略時は現在）")
+    add.set_defaults(func=cmd_add)
+
+    edit = commands.add_parser('edit', help="記録の学習時間・科目を修正")
+    edit.add_argument('id', type=int)
+    edit.add_argument('minutes', type=positive_int)
+    edit.add_argument('--subject', choices=list(SUBJECTS))
+    edit.set_defaults(func=cmd_edit)
+
+    delete = commands.add_parser('delete', help="記録を削除")
+    delete.add_argument('id', type=int)
+    delete.set_defaults(func=cmd_delete)
+
+    reset_day = commands.add_parser('reset-day', help="指定日の記録をリセット")
+    reset_day.add_argument('date', type=lambda text: parse_time(text, '%Y-%m-%d'))
+    reset_day.set_defaults(func=cmd_reset_day)
+
+    stats = commands.add_parser('stats', help="ステータスと集計を表示")
+    stats.add_argument('--days', type=positive_int, help="直近の日別集計を表示する日数")
+    stats.add_argument('--json', action='store_true')
+    stats.set_defaults(func=cmd_stats)
+
+    predict = commands.add_parser('predict', help="目標時間への到達日数を予測")
+    predict.add_argument('--subject', choices=list(SUBJECTS))
+    predict.add_argument('--targets', type=positive_int, nargs='+', help="目標時間（時間）")
+    predict.add_argument('--json', action='store_true')
+    predict.set_defaults(func=cmd_predict)
+
+    export = commands.add_parser('export', help="学習記録をCSV/JSONL/Parquet/Arrowで出力")
+    export.add_argument('--format', default='csv', choices=['csv', 'jsonl', 'parquet', 'arrow'],
+                        help="parquet/arrow は pyarrow が必要")
+    export.add_argument('--output', '-o', help="出力先（csv/jsonl は省略時に標準出力）")
+    export.add_argument('--from', dest='start', type=lambda text: parse_time(text, '%Y-%m-%d'),
+                        help="この日以降（YYYY-MM-DD）")
+    export.add_argument('--to', dest='end', type=lambda text: parse_time(text, '%Y-%m-%d'),
+                        help="この日まで（YYYY-MM-DD）")
+    export.add_argument('--subject', choices=list(SUBJECTS), nargs='+')
+    export.set_defaults(func=cmd_export)
+
+    import_ = commands.add_parser('import', help="CSV/JSONLの学習記録をまとめて取り込む")
+    import_.add_argument('file')
+    import_.add_argument('--format', choices=['csv', 'jsonl'],
+                         help="入力形式（省略時は拡張子で判定）")
+    import_.set_defaults(func=cmd_import)
+
+    batch = commands.add_parser('batch', help="ファイル（- は標準入力）のコマンドをまとめて実行")
+    batch.add_argument('file', nargs='?', default='-')
+    batch.set_defaults(func=lambda tracker, args: cmd_batch(tracker, args,
+                                                            build_parser(batch_line=True)))
+
+    profiles = commands.add_parser('profiles', help="学習者の一覧を表示")
+    profiles.add_argument('--add', metavar='NAME', help="学習者を追加")
+    profiles.set_defaults(func=cmd_profiles)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    profiles = ProfileIndex()
+    profile = None
+    try:
+        if args.command == 'profiles':
+            args.func(profiles, args)
+            return 0
+        profile, tracker = open_tracker(args, profiles)
+        args.func(tracker, args)
+    except CommandError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    if profile is not None:
+        profiles.update_summary(profile, tracker)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,15 @@
 import tkinter as tk
+import argparse
+import importlib.util
 from views.app import StudyApp
 import sys
 
 def check_requirements():
-    try:
-        import matplotlib
-        import pandas
-        import numpy
-        return True
-    except ImportError as e:
+    # 起動を速くするため、ここでは読み込まずに存在だけを確認する
+    # （読み込みは統計ウィンドウを初めて開いたとき）
+    missing = [name for name in ("matplotlib", "pandas", "numpy")
+               if importlib.util.find_spec(name) is None]
+    if missing:
         tk.messagebox.showerror(
             "エラー",
             "必要なパッケージが不足しています。\n"
@@ -16,9 +17,21 @@ def check_requirements():
             "pip install matplotlib pandas numpy"
         )
         return False
+    return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Study Level-up System")
+    parser.add_argument('--server', help="server.py のURL（指定するとそのクライアントとして動く）")
+    args = parser.parse_args()
     if check_requirements():
         root = tk.Tk()
-        app = StudyApp(root)
+        # 通信用のモジュールはサーバーを指定したときだけ読み込む
+        connection_errors = ()
+        if args.server:
+            from models.remote import RemoteError as connection_errors
+        try:
+            app = StudyApp(root, server=args.server)
+        except connection_errors as e:
+            tk.messagebox.showerror("エラー", str(e))
+            sys.exit(1)
         root.mainloop()
\ No newline at end of file
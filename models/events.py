@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+# 学習記録の変更通知（記録は (id, minutes, subject, exp, 'YYYY-MM-DD HH:MM')）
+RecordAdded = namedtuple('RecordAdded', 'record')
+RecordModified = namedtuple('RecordModified', 'old new')
+RecordDeleted = namedtuple('RecordDeleted', 'records')
+DayReset = namedtuple('DayReset', 'date records')
+RecordsImported = namedtuple('RecordsImported', 'records')
+AllReset = namedtuple('AllReset', '')
+TicketUsed = namedtuple('TicketUsed', 'tickets')
+
+# 学習記録そのものが変わる通知
+RECORD_EVENTS = (RecordAdded, RecordModified, RecordDeleted, DayReset, RecordsImported, AllReset)
+
+
+def affected_subjects(event):
+    """変更で集計が変わる科目（全体が変わる場合は None）"""
+    if isinstance(event, RecordAdded):
+        return {event.record[2]}
+    if isinstance(event, RecordModified):
+        return {event.old[2], event.new[2]}
+    if isinstance(event, (RecordDeleted, DayReset, RecordsImported)):
+        return {record[2] for record in event.records}
+    if isinstance(event, TicketUsed):
+        return set()
+    return None
+
+
+class EventBus:
+    """StudyTracker の変更を購読しているビューへ通知する
+
+    通知は tracker のレベル・EXP・集計を更新してから送るため、購読側は
+    それらをそのまま参照してよい。ただし batch() 中やグループコミット中は、
+    保留した変更を flush() で書き込む前に通知が届く（保存済みとは限らない）。
+    """
+
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, event_types, handler):
+        """event_types（クラスまたはそのタプル）の通知を購読し、解除用の関数を返す"""
+        if not isinstance(event_types, tuple):
+            event_types = (event_types,)
+        for event_type in event_types:
+            self.handlers.setdefault(event_type, []).append(handler)
+
+        def unsubscribe():
+            for event_type in event_types:
+                handlers = self.handlers.get(event_type, [])
+                if handler in handlers:
+                    handlers.remove(handler)
+        return unsubscribe
+
+    def publish(self, event):
+        # 通知中に購読解除されても残りへ届くように複製してから回す
+        for handler in list(self.handlers.get(type(event), ())):
+            handler(event)
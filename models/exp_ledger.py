@@ -0,0 +1,33 @@
+import math
+
+
+class ExpLedger:
+    """記録の累積EXP
+
+    レベル・EXP・チケットの再計算に必要なのは累積EXPだけなので、
+    記録ごとのデータは持たず、変更時に差分だけを足し引きする。
+    """
+
+    # 足し引きを繰り返した丸め誤差でレベルの境目を越えないよう、合計はこの桁で丸める
+    DIGITS = 9
+
+    def __init__(self, study_log=()):
+        if hasattr(study_log, 'exps'):
+            self.sum = math.fsum(study_log.exps)
+        else:
+            self.sum = math.fsum(log[3] for log in study_log)
+
+    def total(self):
+        return round(self.sum, self.DIGITS)
+
+    def add(self, log):
+        self.sum += log[3]
+
+    def add_many(self, logs):
+        self.sum += math.fsum(log[3] for log in logs)
+
+    def update(self, old, new):
+        self.sum += new[3] - old[3]
+
+    def remove(self, logs):
+        self.sum -= math.fsum(log[3] for log in logs)
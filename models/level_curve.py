@@ -0,0 +1,48 @@
+from bisect import bisect_right
+
+
+class LevelCurve:
+    """レベルアップに必要なEXPの曲線（base * level ** exponent）
+
+    レベルごとの累積必要EXPの表を必要な分だけ延長して保持し、
+    累積EXPからのレベル計算を二分探索で行う。
+    """
+
+    def __init__(self, base=100, exponent=1.5):
+        self.base = base
+        self.exponent = exponent
+        # thresholds[i] はレベル i+1 に到達するのに必要な累積EXP
+        self.thresholds = [0.0]
+
+    def required_exp(self, level):
+        """level から次のレベルに上がるのに必要なEXP"""
+        return self.base * (level ** self.exponent)
+
+    def extend(self, total_exp):
+        """total_exp を超えるレベルまで表を延長"""
+        thresholds = self.thresholds
+        while thresholds[-1] <= total_exp:
+            thresholds.append(thresholds[-1] + self.required_exp(len(thresholds)))
+
+    def threshold(self, level):
+        """level に到達するのに必要な累積EXP"""
+        while len(self.thresholds) < level:
+            self.thresholds.append(
+                self.thresholds[-1] + self.required_exp(len(self.thresholds)))
+        return self.thresholds[level - 1]
+
+    def resolve(self, total_exp):
+        """累積EXPから（レベル, レベル内のEXP, 獲得チケット数）を求める"""
+        self.extend(total_exp)
+        level = bisect_right(self.thresholds, total_exp)
+        return level, total_exp - self.thresholds[level - 1], level - 1
+
+    def level_up(self, level, exp):
+        """現在のレベルとEXPから（レベル, EXP, 上がったレベル数）を求める"""
+        if exp < self.required_exp(level):
+            return level, exp, 0
+        new_level, new_exp, _ = self.resolve(self.threshold(level) + exp)
+        return new_level, new_exp, new_level - level
+
+
+LEVEL_CURVE = LevelCurve()
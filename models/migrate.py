@@ -0,0 +1,34 @@
+import os
+import sys
+from .storage import JournalStorage, SqliteStorage
+from .study_tracker import StudyTracker
+
+
+def migrate_json_to_sqlite(json_file, db_file):
+    """study_data.json（とジャーナル）の内容をSQLiteへ移行
+
+    重複したIDは読み込み時に振り直される。一時ファイルへ書き出してから
+    置き換えるため、途中で失敗しても書きかけの db_file は残らない。
+    """
+    tracker = StudyTracker(json_file, storage=JournalStorage(json_file))
+    temp_file = db_file + '.tmp'
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    storage = SqliteStorage(temp_file)
+    try:
+        storage.save(tracker.snapshot())
+    except Exception:
+        storage.conn.close()
+        os.remove(temp_file)
+        raise
+    storage.conn.close()
+    os.replace(temp_file, db_file)
+    return len(tracker.study_log)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m models.migrate study_data.json study_data.db")
+        sys.exit(1)
+    count = migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
+    print(f"{count}件の記録を移行しました")
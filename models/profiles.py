@@ -0,0 +1,102 @@
+import json
+import os
+import re
+from utils.config import PROFILE_CONFIG, STORAGE_CONFIG
+from .storage import FileLock, atomic_dump
+from .study_tracker import StudyTracker
+
+
+class ProfileIndex:
+    """学習者（プロフィール）の一覧
+
+    各プロフィールのデータは profiles/<フォルダ>/study_data.json に分けて保存し、
+    一覧ファイルにはデータファイルの場所と、一覧表示用にキャッシュした
+    レベル・総学習時間だけを持つ。既定のプロフィールは従来の study_data.json を使う。
+
+    一覧ファイルはCLIとGUIなど複数のプロセスから書き換えるため、変更はロックを
+    取って読み直した一覧に1件分だけ反映してから書き出す。
+    """
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file or PROFILE_CONFIG["index_file"]
+        self.directory = os.path.dirname(self.index_file)
+        self.default = PROFILE_CONFIG["default"]
+        self.file_lock = FileLock(os.path.splitext(self.index_file)[0] + '.lock')
+        self.reload()
+
+    def reload(self):
+        """一覧ファイルを読み直す"""
+        self.profiles = {self.default: {'data_file': STORAGE_CONFIG["data_file"]}}
+        self.current = self.default
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.profiles.update(data.get('profiles', {}))
+            if data.get('current') in self.profiles:
+                self.current = data['current']
+
+    def change(self, update):
+        """ロック中に一覧を読み直し、update() で変更してから書き出す"""
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        with self.file_lock:
+            self.reload()
+            if update() is not False:
+                atomic_dump({'current': self.current, 'profiles': self.profiles},
+                            self.index_file)
+
+    def names(self):
+        return list(self.profiles)
+
+    def data_file(self, name):
+        if name not in self.profiles:
+            raise KeyError(f"Unknown profile: {name}")
+        return self.profiles[name]['data_file']
+
+    def create(self, name):
+        """新しいプロフィールを作成（データは最初の保存時に作られる）"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Profile name is empty")
+
+        def add():
+            # 他のプロセスが追加した学習者とも名前・フォルダが重ならないよう、読み直した一覧で確かめる
+            if name in self.profiles:
+                raise ValueError(f"Profile already exists: {name}")
+            folder = re.sub(r'[^\w-]', '_', name)
+            used = {os.path.dirname(profile['data_file']) for profile in self.profiles.values()}
+            candidate, number = folder, 1
+            while os.path.join(self.directory, candidate) in used:
+                number += 1
+                candidate = f"{folder}_{number}"
+            shard = os.path.join(self.directory, candidate)
+            os.makedirs(shard, exist_ok=True)
+            self.profiles[name] = {'data_file': os.path.join(
+                shard, os.path.basename(STORAGE_CONFIG["data_file"]))}
+        self.change(add)
+
+    def open(self, name):
+        """プロフィールのデータだけを読み込んだ StudyTracker を返す"""
+        tracker = StudyTracker(self.data_file(name))
+        if name != self.current:
+            def select():
+                if name not in self.profiles:
+                    return False
+                self.current = name
+            self.change(select)
+        return tracker
+
+    def update_summary(self, name, tracker):
+        """一覧表示用のレベル・総学習時間を更新"""
+        total_minutes, _ = tracker.totals()
+        profile = self.profiles[name]
+        if profile.get('level') == tracker.level and profile.get('total_minutes') == total_minutes:
+            return
+
+        def summarize():
+            profile = self.profiles.get(name)
+            if profile is None:
+                return False
+            profile['level'] = tracker.level
+            profile['total_minutes'] = total_minutes
+        self.change(summarize)
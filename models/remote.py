@@ -0,0 +1,121 @@
+import json
+from contextlib import nullcontext
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from .events import AllReset, TicketUsed
+from .study_tracker import StudyTracker
+
+
+class RemoteError(Exception):
+    """サーバーへの要求に失敗したときのエラー"""
+
+
+class RemoteStorage:
+    """server.py から全データを読み込む保存先（書き込みはサーバー側で行う）"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.seq = 0
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = Request(self.url + path, data=data, method=method,
+                          headers={'Content-Type': 'application/json'})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read())['error']
+            except (ValueError, KeyError):
+                message = str(e)
+            raise RemoteError(message)
+        except (URLError, OSError) as e:
+            raise RemoteError(f"サーバーに接続できません: {e}")
+
+    def load(self):
+        response = self.request('GET', '/snapshot')
+        self.seq = response['seq']
+        return response['data'], []
+
+    def lock(self):
+        return nullcontext()
+
+    def changes(self):
+        return []
+
+    def append(self, event, snapshot):
+        pass
+
+    def append_many(self, events, snapshot):
+        pass
+
+    def save(self, data):
+        pass
+
+
+class RemoteTracker(StudyTracker):
+    """server.py のクライアントとして動く StudyTracker
+
+    記録の変更はサーバーへ送り、サーバーが実行した変更（他のクライアントの
+    変更を含む）を手元の記録へ反映して通知する。集計は手元の記録で行う。
+    """
+
+    request_errors = RemoteError
+
+    def __init__(self, url, timeout=5):
+        super().__init__(storage=RemoteStorage(url, timeout))
+
+    def load_data(self):
+        super().load_data()
+        self.seq = self.storage.seq
+
+    def call(self, method, path, body=None):
+        response = self.storage.request(method, f"{path}?since={self.seq}", body)
+        self.sync(response)
+        return response['result']
+
+    def refresh(self):
+        """他のクライアントの変更を取り込む"""
+        self.sync(self.storage.request('GET', f"/events?since={self.seq}"))
+
+    def sync(self, response):
+        events = response['events']
+        if events is None:
+            # 差分が残っていないほど古い場合は読み込み直す
+            self.load_data()
+            self.notify(AllReset())
+            return
+        for event in events:
+            change = self.apply_event(event)
+            self.exp, self.level, self.tickets = event['state']
+            if event['op'] == 'ticket':
+                change = TicketUsed(self.tickets)
+            self.notify(change)
+        self.last_id = max(self.study_log.ids, default=0)
+        self.seq = response['seq']
+
+    def add_study(self, minutes, subject, difficulty, study_date=None):
+        body = {'minutes': minutes, 'subject': subject}
+        if study_date:
+            body['studied_at'] = study_date
+        return self.call('POST', '/study', body)
+
+    def import_sessions(self, sessions):
+        return self.call('POST', '/import', {'sessions': [list(session) for session in sessions]})
+
+    def use_ticket(self):
+        return self.call('POST', '/ticket')
+
+    def reset_day(self, target_date):
+        self.call('POST', '/reset-day', {'date': target_date})
+
+    def modify_record(self, record_id, minutes, subject, difficulty):
+        self.call('PUT', f"/records/{record_id}", {'minutes': minutes, 'subject': subject})
+
+    def delete_record(self, record_id):
+        self.call('DELETE', f"/records/{record_id}")
+
+    def reset_all(self):
+        return self.call('POST', '/reset-all')
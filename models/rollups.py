@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+from .study_log import day_number, EPOCH_ORDINAL, MINUTES_PER_DAY
+
+
+def to_date(number):
+    """1970-01-01からの日数を date に変換"""
+    return date.fromordinal(number + EPOCH_ORDINAL)
+
+
+def month_key(number):
+    """日数を 年*12 + (月-1) の月番号に変換"""
+    day = to_date(number)
+    return day.year * 12 + day.month - 1
+
+
+def month_end(key):
+    """月番号からその月の末日"""
+    year, month = divmod(key + 1, 12)
+    return date(year, month + 1, 1) - timedelta(days=1)
+
+
+class Rollups:
+    """日・週・月・科目ごとの学習件数・時間・EXPの集計
+
+    記録の追加・変更・削除のたびに差分で更新し、スナップショットと一緒に保存する。
+    各バケットは [件数, 学習時間, EXP] で、件数が0になったバケットは削除する。
+    """
+
+    KINDS = ('days', 'weeks', 'months', 'subjects')
+
+    def __init__(self):
+        self.days = {}      # 1970-01-01からの日数
+        self.weeks = {}     # その週（月曜始まり）の月曜日の日数
+        self.months = {}    # 年*12 + (月-1)
+        self.subjects = {}  # 科目名
+
+    @classmethod
+    def from_log(cls, study_log):
+        rollups = cls()
+        for time, minutes, code, exp in zip(study_log.times, study_log.minutes,
+                                            study_log.subject_codes, study_log.exps):
+            rollups.update(time // MINUTES_PER_DAY, study_log.subjects[code], minutes, exp, 1)
+        return rollups
+
+    @classmethod
+    def from_dict(cls, data):
+        rollups = cls()
+        for kind in ('days', 'weeks', 'months'):
+            setattr(rollups, kind, {int(key): bucket for key, bucket in data[kind].items()})
+        rollups.subjects = dict(data['subjects'])
+        return rollups
+
+    def to_dict(self):
+        """JSON保存用の辞書"""
+        return {kind: getattr(self, kind) for kind in self.KINDS}
+
+    def count(self):
+        return sum(bucket[0] for bucket in self.days.values())
+
+    def add(self, record):
+        self.update(day_number(record[4][:10]), record[2], record[1], record[3], 1)
+
+    def add_many(self, records):
+        """複数の記録を日・科目ごとにまとめてから加算"""
+        groups = {}
+        for record in records:
+            key = (record[4][:10], record[2])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, 0, 0.0]
+            group[0] += 1
+            group[1] += record[1]
+            group[2] += record[3]
+        for (day, subject), (count, minutes, exp) in groups.items():
+            self.update(day_number(day), subject, minutes, exp, count)
+
+    def remove(self, record):
+        self.update(day_number(record[4][:10]), record[2], -record[1], -record[3], -1)
+
+    def update(self, day, subject, minutes, exp, count):
+        # 1970-01-01 は木曜日なので (day + 3) % 7 が月曜=0の曜日
+        for buckets, key in ((self.days, day), (self.weeks, day - (day + 3) % 7),
+                             (self.months, month_key(day)), (self.subjects, subject)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, 0, 0.0]
+            bucket[0] += count
+            bucket[1] += minutes
+            bucket[2] += exp
+            if bucket[0] <= 0:
+                del buckets[key]
+
+    def last(self, kind, count, field=2):
+        """直近 count バケットの（日付のリスト, 値のリスト）
+
+        最後の記録があるバケットまでを、記録のない期間は0で埋めて返す。
+        日付は日次がその日、週次が週末の日曜日、月次が月末。
+        """
+        buckets = getattr(self, kind)
+        if not buckets:
+            return [], []
+        first, last = min(buckets), max(buckets)
+        if kind == 'days':
+            keys = range(max(first, last - count + 1), last + 1)
+            dates = [to_date(key) for key in keys]
+        elif kind == 'weeks':
+            keys = range(max(first, last - 7 * (count - 1)), last + 1, 7)
+            dates = [to_date(key + 6) for key in keys]
+        else:
+            keys = range(max(first, last - count + 1), last + 1)
+            dates = [month_end(key) for key in keys]
+        return dates, [buckets[key][field] if key in buckets else 0 for key in keys]
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+
+class SessionTimer:
+    """学習タイマーの経過時間の管理
+
+    経過時間は time.monotonic() で測り、一時停止中の時間は含めない。
+    計測中は checkpoint_interval 秒ごとに状態を小さなファイルへ書き出し、
+    異常終了しても次回起動時に restore() で続きから再開できるようにする。
+    """
+
+    def __init__(self, checkpoint_file=None, checkpoint_interval=30, clock=time.monotonic):
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        self.subject = None
+        self.accumulated = 0.0   # 一時停止までに計測した秒数
+        self.started = None      # 計測中なら再開した時点の clock()
+        self.last_checkpoint = None
+
+    @property
+    def running(self):
+        return self.started is not None
+
+    @property
+    def paused(self):
+        return self.started is None and self.accumulated > 0
+
+    def elapsed(self):
+        """一時停止中を除いた経過秒数"""
+        if self.started is None:
+            return self.accumulated
+        return self.accumulated + self.clock() - self.started
+
+    def next_tick(self):
+        """表示の秒が次に切り替わるまでのミリ秒"""
+        return 1000 - int(self.elapsed() * 1000) % 1000
+
+    def start(self, subject=None):
+        if self.started is None:
+            self.subject = subject or self.subject
+            self.started = self.clock()
+            self.checkpoint(force=True)
+
+    def pause(self):
+        if self.started is not None:
+            self.accumulated = self.elapsed()
+            self.started = None
+            self.checkpoint(force=True)
+
+    def stop(self):
+        """計測を終えて経過秒数を返す"""
+        elapsed = self.elapsed()
+        self.reset()
+        return elapsed
+
+    def reset(self):
+        self.subject = None
+        self.accumulated = 0.0
+        self.started = None
+        self.last_checkpoint = None
+        if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    def checkpoint(self, force=False):
+        """前回から checkpoint_interval 秒以上経っていれば状態を書き出す"""
+        if not self.checkpoint_file:
+            return
+        now = self.clock()
+        if not force and self.last_checkpoint is not None \
+                and now - self.last_checkpoint < self.checkpoint_interval:
+            return
+        self.last_checkpoint = now
+        # 小さなファイルなので fsync はせず、置き換えだけで書き込み途中の破損を防ぐ
+        temp_file = self.checkpoint_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump({
+                'subject': self.subject,
+                'elapsed': self.elapsed(),
+                'running': self.running,
+                'saved_at': time.time()
+            }, f)
+        os.replace(temp_file, self.checkpoint_file)
+
+    def load_checkpoint(self):
+        """前回終了しなかった計測の状態（なければ None）"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                state = json.load(f)
+            float(state['elapsed'])
+        except (ValueError, KeyError, TypeError):
+            return None
+        return state
+
+    def restore(self, state):
+        """load_checkpoint() の状態を一時停止として復元
+
+        最後の書き出し以降の時間は学習していたか分からないため含めない。
+        """
+        self.subject = state.get('subject')
+        self.accumulated = float(state['elapsed'])
+        self.started = None
+        self.checkpoint(force=True)
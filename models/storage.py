@@ -0,0 +1,367 @@
+import json
+import os
+import sqlite3
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def fsync_directory(path):
+    """ファイルの作成・置き換えをディスクに反映（POSIXのみ）"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_dump(data, path):
+    """一時ファイルへ書き出してから置き換える（書き込み中に終了しても元のファイルは壊れない）"""
+    temp_file = path + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, path)
+    fsync_directory(path)
+
+
+def file_stat(path):
+    """ファイルが置き換え・追記されたかを比べるための値（ファイルがなければ None）"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class FileLock:
+    """同じデータファイルを使うプロセス間の排他（アドバイザリロック）
+
+    同じプロセス内では入れ子にできる。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.depth = 0
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.file = open(self.path, 'a+')
+            if fcntl:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            else:
+                self.file.seek(0)
+                # LK_LOCK は約10秒で諦めるため、取れるまで繰り返す
+                while True:
+                    try:
+                        msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.file.close()
+            self.file = None
+
+
+class JsonStorage:
+    """study_data.json を毎回まるごと書き換える従来の保存方式
+
+    保存のたびに版番号（seq）を増やしてファイルに書き込み、
+    changes() で他のプロセスが先に保存したかを確かめられるようにする。
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.file_lock = FileLock(os.path.splitext(data_file)[0] + '.lock')
+        self.seq = 0
+        self.snapshot_stat = None
+
+    def lock(self):
+        """読み込み・書き込みの間、他のプロセスを待たせる"""
+        return self.file_lock
+
+    def read_snapshot(self):
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r') as f:
+                return json.load(f)
+        return None
+
+    def load(self):
+        """スナップショットと未反映イベントを返す"""
+        self.snapshot_stat = file_stat(self.data_file)
+        data = self.read_snapshot()
+        self.seq = data.get('seq', 0) if data else 0
+        return data, []
+
+    def changes(self):
+        """前回の読み込み・保存以降に他のプロセスが保存した変更
+
+        変更がなければ空のリスト、内容が分からなければ None（読み込み直しが必要）。
+        """
+        stat = file_stat(self.data_file)
+        if stat == self.snapshot_stat:
+            return []
+        data = self.read_snapshot()
+        if data and data.get('seq', 0) == self.seq:
+            self.snapshot_stat = stat
+            return []
+        return None
+
+    def append(self, event, snapshot):
+        self.save(snapshot())
+
+    def append_many(self, events, snapshot):
+        self.save(snapshot())
+
+    def save(self, data):
+        self.seq += 1
+        data['seq'] = self.seq
+        atomic_dump(data, self.data_file)
+        self.snapshot_stat = file_stat(self.data_file)
+
+
+class JournalStorage(JsonStorage):
+    """スナップショット + 追記専用ジャーナルによる保存方式
+
+    変更は1イベント1行でジャーナルに追記し、一定件数ごとに
+    スナップショット（study_data.json）へ圧縮する。
+    """
+
+    def __init__(self, data_file, compact_every=500):
+        super().__init__(data_file)
+        self.journal_file = os.path.splitext(data_file)[0] + '.journal'
+        self.compact_every = compact_every
+        self.pending = 0
+        self.offset = 0  # ジャーナルの読み込み・書き込み済みの位置
+
+    def load(self):
+        data, _ = super().load()
+        self.offset = 0
+        self.pending = 0
+        return data, self.read_journal()
+
+    def read_journal(self):
+        """ジャーナルの offset 以降のイベントを読む（ロック中に呼ぶ）"""
+        events = []
+        if not os.path.exists(self.journal_file):
+            return events
+        torn = False
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    torn = True
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                self.offset += len(line)
+                # 圧縮済みのイベントは読み飛ばす
+                if event['seq'] > self.seq:
+                    events.append(event)
+                    self.seq = event['seq']
+        if torn:
+            # 書き込み途中で終了した末尾行は捨てる。追記はロック中に行うため、
+            # ロック中に見える途中の行は終了した書き込みの残りで、残すと次の追記と
+            # 1行につながり、それ以降のイベントが読めなくなる
+            os.truncate(self.journal_file, self.offset)
+        self.pending += len(events)
+        return events
+
+    def changes(self):
+        """他のプロセスが追記したイベント（圧縮されていて分からなければ None）"""
+        if super().changes() is None:
+            return None
+        size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return []
+        return self.read_journal()
+
+    def append(self, event, snapshot):
+        self.append_many([event], snapshot)
+
+    def append_many(self, events, snapshot):
+        """複数のイベントを1回の書き込みで追記"""
+        lines = []
+        for event in events:
+            self.seq += 1
+            event['seq'] = self.seq
+            # 取り込みでは1イベントが大きくなるため、区切りの空白を省いて書き出す
+            lines.append((json.dumps(event, separators=(',', ':'), check_circular=False)
+                          + '\n').encode('utf-8'))
+        with open(self.journal_file, 'ab') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+        self.pending += len(events)
+        if self.pending >= self.compact_every:
+            self.save(snapshot())
+
+    def save(self, data):
+        """スナップショットを書き出してジャーナルを空にする"""
+        super().save(data)
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self.offset = 0
+        self.pending = 0
+
+
+class SqliteStorage:
+    """SQLiteによる保存方式
+
+    記録ID・日付・科目にインデックスを張り、合計・科目別・日別の集計と
+    IDでの検索はSQL側で行う。ただし起動時には全記録を StudyLog に読み込み、
+    日別の一覧・時間帯別の分析・予測はその記録を使う。
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.file_lock = FileLock(os.path.splitext(db_file)[0] + '.lock')
+        self.seq = 0
+        self.conn = sqlite3.connect(db_file)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                minutes INTEGER NOT NULL,
+                subject TEXT NOT NULL,
+                exp REAL NOT NULL,
+                studied_at TEXT NOT NULL,
+                day TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_records_day ON records(day);
+            CREATE INDEX IF NOT EXISTS idx_records_subject ON records(subject);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value
+            );
+        """)
+
+    def lock(self):
+        return self.file_lock
+
+    def load(self):
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.seq = meta.get('seq', 0)
+        if not meta:
+            return None, []
+        data = {
+            'exp': meta.get('exp', 0),
+            'level': meta.get('level', 1),
+            'tickets': meta.get('tickets', 0),
+            'study_log': [tuple(row) for row in self.conn.execute(
+                "SELECT id, minutes, subject, exp, studied_at FROM records ORDER BY id")]
+        }
+        return data, []
+
+    def changes(self):
+        """他のプロセスが保存していれば None（記録の差分は持たないため読み込み直す）"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        return [] if (row[0] if row else 0) == self.seq else None
+
+    def append(self, event, snapshot):
+        self.append_many([event], snapshot)
+
+    def append_many(self, events, snapshot):
+        """複数のイベントを1つのトランザクションで反映"""
+        with self.conn:
+            for event in events:
+                self.apply(event)
+            self.save_seq()
+
+    def apply(self, event):
+        op = event['op']
+        if op == 'add':
+            self.conn.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                self.to_row(event['record']))
+        elif op == 'import':
+            self.conn.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                (self.to_row(record) for record in event['records']))
+        elif op == 'modify':
+            record_id, minutes, subject, exp, _ = event['record']
+            self.conn.execute(
+                "UPDATE records SET minutes = ?, subject = ?, exp = ? WHERE id = ?",
+                (minutes, subject, exp, record_id))
+        elif op == 'delete':
+            self.conn.execute("DELETE FROM records WHERE id = ?", (event['id'],))
+        elif op == 'reset_day':
+            self.conn.execute("DELETE FROM records WHERE day = ?", (event['date'],))
+        self.save_state(*event['state'])
+
+    def save(self, data):
+        with self.conn:
+            self.conn.execute("DELETE FROM records")
+            self.conn.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                (self.to_row(log) for log in data['study_log']))
+            self.save_state(data['exp'], data['level'], data['tickets'])
+            self.save_seq()
+
+    def save_seq(self):
+        self.seq += 1
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('seq', ?)", (self.seq,))
+
+    def save_state(self, exp, level, tickets):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [('exp', exp), ('level', level), ('tickets', tickets)])
+
+    def to_row(self, log):
+        record_id, minutes, subject, exp, studied_at = log
+        return (record_id, minutes, subject, exp, studied_at, studied_at.split()[0])
+
+    # 集計クエリ
+    def find_record(self, record_id):
+        row = self.conn.execute(
+            "SELECT id, minutes, subject, exp, studied_at FROM records WHERE id = ?",
+            (record_id,)).fetchone()
+        return tuple(row) if row else None
+
+    def totals(self):
+        minutes, exp = self.conn.execute(
+            "SELECT COALESCE(SUM(minutes), 0), COALESCE(SUM(exp), 0) FROM records").fetchone()
+        return minutes, exp
+
+    def subject_totals(self):
+        return {
+            subject: {'time': minutes, 'exp': exp}
+            for subject, minutes, exp in self.conn.execute(
+                "SELECT subject, SUM(minutes), SUM(exp) FROM records GROUP BY subject")
+        }
+
+    def daily_totals(self):
+        return [tuple(row) for row in self.conn.execute(
+            "SELECT day, SUM(minutes), SUM(exp) FROM records GROUP BY day ORDER BY day")]
+
+
+def create_storage(data_file, backend='journal', compact_every=500):
+    """設定名から保存方式を生成"""
+    if backend == 'json':
+        return JsonStorage(data_file)
+    if backend == 'journal':
+        return JournalStorage(data_file, compact_every)
+    if backend == 'sqlite':
+        return SqliteStorage(os.path.splitext(data_file)[0] + '.db')
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,301 @@
+from array import array
+from datetime import date
+from itertools import count
+from utils.config import SUBJECTS
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MINUTES_PER_DAY = 24 * 60
+
+# 変更のたびに振られる全インスタンス共通の版番号
+_versions = count(1)
+
+# 'YYYY-MM-DD' <-> 1970-01-01からの日数 の変換キャッシュ
+_day_numbers = {}
+_day_texts = {}
+
+
+def day_number(day_text):
+    """'YYYY-MM-DD' を1970-01-01からの日数に変換（形式が違えば ValueError）"""
+    number = _day_numbers.get(day_text)
+    if number is None:
+        if len(day_text) != 10 or day_text[4] != '-' or day_text[7] != '-':
+            raise ValueError(f"Invalid date: {day_text!r}")
+        day = date(int(day_text[0:4]), int(day_text[5:7]), int(day_text[8:10]))
+        # キャッシュは day_text() の戻り値にもなるため、正しい表記（'2024-5-01' や
+        # 空白入りでないもの）だけを登録する
+        if day.isoformat() != day_text:
+            raise ValueError(f"Invalid date: {day_text!r}")
+        number = day.toordinal() - EPOCH_ORDINAL
+        _day_numbers[day_text] = number
+        _day_texts[number] = day_text
+    return number
+
+
+def day_text(number):
+    """1970-01-01からの日数を 'YYYY-MM-DD' に変換"""
+    text = _day_texts.get(number)
+    if text is None:
+        text = date.fromordinal(number + EPOCH_ORDINAL).isoformat()
+        _day_numbers[text] = number
+        _day_texts[number] = text
+    return text
+
+
+def to_epoch_minutes(timestamp):
+    """'YYYY-MM-DD HH:MM' を1970-01-01 00:00からの分数に変換"""
+    return (day_number(timestamp[:10]) * MINUTES_PER_DAY
+            + int(timestamp[11:13]) * 60 + int(timestamp[14:16]))
+
+
+# 'HH:MM' -> 0:00からの分数（大量の記録をまとめて変換するときに使う）
+_clock_minutes = {f"{hour:02d}:{minute:02d}": hour * 60 + minute
+                  for hour in range(24) for minute in range(60)}
+
+
+def to_epoch_minutes_many(timestamps):
+    """to_epoch_minutes() をまとめて行い、array('q') で返す
+
+    日付は種類ごとに1回だけ変換し、時刻は 'HH:MM' の表から引く。
+    """
+    timestamps = list(timestamps)
+    day_minutes = {}
+    for day in {timestamp[:10] for timestamp in timestamps}:
+        try:
+            day_minutes[day] = day_number(day) * MINUTES_PER_DAY
+        except ValueError:
+            pass
+    clock = _clock_minutes
+    try:
+        return array('q', [day_minutes[timestamp[:10]] + clock[timestamp[11:16]]
+                           for timestamp in timestamps])
+    except KeyError:
+        # 形式の違う日時を含む場合は1件ずつ変換する（誤りは ValueError になる）
+        return array('q', [to_epoch_minutes(timestamp) for timestamp in timestamps])
+
+
+def format_epoch_minutes(minutes):
+    """1970-01-01 00:00からの分数を 'YYYY-MM-DD HH:MM' に変換"""
+    days, rest = divmod(minutes, MINUTES_PER_DAY)
+    return f"{day_text(days)} {rest // 60:02d}:{rest % 60:02d}"
+
+
+class StudyLog:
+    """学習記録を列ごとの型付き配列で保持するコンテナ
+
+    各記録は従来どおり (id, minutes, subject, exp, 'YYYY-MM-DD HH:MM')
+    のタプルとして読み書きできる。科目は SUBJECTS を先頭にした番号で、
+    日時は1970-01-01 00:00からの分数で保持する。
+
+    集計用の派生データは version ごとにキャッシュされ、変更時に破棄される。
+    """
+
+    def __init__(self, records=()):
+        self.ids = array('i')
+        self.minutes = array('i')
+        self.subject_codes = array('H')
+        self.exps = array('d')
+        self.times = array('q')
+        self.subjects = list(SUBJECTS.keys())
+        self.codes = {subject: code for code, subject in enumerate(self.subjects)}
+        self.exported = False
+        self.version = next(_versions)
+        self.cache = {}
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        return (self.ids[i], self.minutes[i], self.subjects[self.subject_codes[i]],
+                self.exps[i], format_epoch_minutes(self.times[i]))
+
+    def __setitem__(self, i, record):
+        self.changed()
+        record_id, minutes, subject, exp, timestamp = record
+        self.ids[i] = record_id
+        self.minutes[i] = minutes
+        self.subject_codes[i] = self.subject_code(subject)
+        self.exps[i] = exp
+        self.times[i] = to_epoch_minutes(timestamp)
+
+    def subject_code(self, subject):
+        code = self.codes.get(subject)
+        if code is None:
+            # SUBJECTS にない科目（設定変更前の記録など）も保持する
+            code = len(self.subjects)
+            self.subjects.append(subject)
+            self.codes[subject] = code
+        return code
+
+    def append(self, record):
+        self.changed()
+        record_id, minutes, subject, exp, timestamp = record
+        self.ids.append(record_id)
+        self.minutes.append(minutes)
+        self.subject_codes.append(self.subject_code(subject))
+        self.exps.append(exp)
+        self.times.append(to_epoch_minutes(timestamp))
+
+    def extend(self, records):
+        """複数の記録をまとめて追加（版の更新は1回だけ）"""
+        self.changed()
+        records = list(records)
+        for subject in {record[2] for record in records}:
+            self.subject_code(subject)  # 未登録の科目を先に登録
+        if not records:
+            return
+        # 列ごとに分けてから配列へ追加する（1件ずつ取り出すより速い）
+        ids, minutes, subjects, exps, timestamps = zip(*records)
+        self.ids.extend(ids)
+        self.minutes.extend(minutes)
+        self.subject_codes.extend(map(self.codes.__getitem__, subjects))
+        self.exps.extend(exps)
+        self.times.extend(to_epoch_minutes_many(timestamps))
+
+    def renumber_duplicates(self):
+        """重複したID（2件目以降）を最大ID以降の番号に振り直し、振り直した件数を返す"""
+        seen = set()
+        next_id = max(self.ids, default=0)
+        renumbered = 0
+        for i in range(len(self.ids)):
+            record_id = self.ids[i]
+            if record_id not in seen:
+                seen.add(record_id)
+                continue
+            if not renumbered:
+                self.changed()
+            next_id += 1
+            self.ids[i] = next_id
+            renumbered += 1
+        return renumbered
+
+    def sort_by_time(self, start=0):
+        """日時順（同じ日時は元の順）に並べ替え、並べ替えたかを返す
+
+        過去の記録が末尾に付くと、分析で「直近」の記録を取り違えるため。
+        start 以降だけを追加した場合は、その範囲と直前の1件だけを確かめる。
+        """
+        times = self.times
+        checked = times[max(start - 1, 0):]
+        if all(earlier <= later for earlier, later in zip(checked, checked[1:])):
+            return False
+        self.take(sorted(range(len(times)), key=times.__getitem__))
+        return True
+
+    def take(self, positions):
+        """positions の順に並べた記録だけを残す"""
+        self.changed()
+        self.ids = array('i', (self.ids[i] for i in positions))
+        self.minutes = array('i', (self.minutes[i] for i in positions))
+        self.subject_codes = array('H', (self.subject_codes[i] for i in positions))
+        self.exps = array('d', (self.exps[i] for i in positions))
+        self.times = array('q', (self.times[i] for i in positions))
+
+    def position(self, record_id):
+        """指定IDの記録の位置（なければ None）"""
+        try:
+            return self.ids.index(record_id)
+        except ValueError:
+            return None
+
+    def find(self, record_id):
+        """指定IDの記録を取得（なければ None）"""
+        i = self.position(record_id)
+        return None if i is None else self[i]
+
+    def replace(self, record):
+        """同じIDの記録を置き換えて元の記録を返す"""
+        i = self.position(record[0])
+        if i is None:
+            return None
+        old = self[i]
+        self[i] = record
+        return old
+
+    def remove_ids(self, record_ids):
+        """指定IDの記録を削除して削除した記録を返す"""
+        record_ids = set(record_ids)
+        return self.remove_where(lambda i: self.ids[i] in record_ids)
+
+    def remove_day(self, target_date):
+        """指定日（'YYYY-MM-DD'）の記録を削除して削除した記録を返す"""
+        start = day_number(target_date) * MINUTES_PER_DAY
+        end = start + MINUTES_PER_DAY
+        return self.remove_where(lambda i: start <= self.times[i] < end)
+
+    def remove_where(self, predicate):
+        removed = [i for i in range(len(self.ids)) if predicate(i)]
+        if not removed:
+            return []
+        records = [self[i] for i in removed]
+        removed = set(removed)
+        self.take([i for i in range(len(self.ids)) if i not in removed])
+        return records
+
+    def changed(self):
+        """変更前に呼ぶ。キャッシュを破棄し、NumPyビューに渡した配列は複製する"""
+        self.version = next(_versions)
+        self.cache.clear()
+        if self.exported:
+            self.ids = array('i', self.ids)
+            self.minutes = array('i', self.minutes)
+            self.subject_codes = array('H', self.subject_codes)
+            self.exps = array('d', self.exps)
+            self.times = array('q', self.times)
+            self.exported = False
+
+    def as_numpy(self):
+        """各列をコピーなしのNumPy配列として返す
+
+        返した配列は変更前の内容を保持し続ける（変更時は内部で複製される）。
+        """
+        import numpy as np
+        self.exported = True
+        return {
+            'id': np.frombuffer(self.ids, dtype=np.int32),
+            'minutes': np.frombuffer(self.minutes, dtype=np.int32),
+            'subject_code': np.frombuffer(self.subject_codes, dtype=np.uint16),
+            'exp': np.frombuffer(self.exps, dtype=np.float64),
+            'time': np.frombuffer(self.times, dtype=np.int64).view('datetime64[m]'),
+            'subjects': list(self.subjects)
+        }
+
+    def cached(self, key, build):
+        """現在の版に対する build() の結果をキャッシュして返す"""
+        if key not in self.cache:
+            self.cache[key] = build()
+        return self.cache[key]
+
+    def time_columns(self):
+        """as_numpy() の列に日付・時・曜日の列を加えたもの（キャッシュ共有）"""
+        return self.cached('time_columns', self.build_time_columns)
+
+    def newest_first(self):
+        """日時の新しい順に並べた記録の位置（キャッシュ共有）"""
+        return self.cached('newest_first', self.build_newest_first)
+
+    def build_newest_first(self):
+        import numpy as np
+        columns = self.as_numpy()
+        # 同じ日時の場合はIDの小さい順
+        return np.lexsort((-columns['id'].astype(np.int64), columns['time']))[::-1]
+
+    def build_time_columns(self):
+        import numpy as np
+        columns = self.as_numpy()
+        minutes = columns['time'].view(np.int64)
+        days = minutes // MINUTES_PER_DAY
+        columns['date'] = days.astype('datetime64[D]')
+        columns['hour'] = (minutes // 60 % 24).astype(np.int8)
+        # 1970-01-01 は木曜日（月曜=0）
+        columns['weekday'] = ((days + 3) % 7).astype(np.int8)
+        return columns
+
+    def to_rows(self):
+        """JSON保存用のリスト"""
+        return [list(record) for record in self]
@@ -1,89 +1,396 @@
-import json
-import os
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter, mul
+from utils.config import STORAGE_CONFIG, SUBJECTS
+from .storage import create_storage
+from .exp_ledger import ExpLedger
+from .level_curve import LEVEL_CURVE
+from .study_log import StudyLog
+from .rollups import Rollups, to_date
+from .events import (
+    EventBus, RecordAdded, RecordModified, RecordDeleted, DayReset,
+    RecordsImported, AllReset, TicketUsed
+)
+
+def added_records(event):
+    """イベントで追加される記録"""
+    if event['op'] == 'add':
+        return [event['record']]
+    if event['op'] == 'import':
+        return event['records']
+    return []
+
+
+def remap_ids(event, remap):
+    """イベント中の記録IDを remap（旧ID → 新ID）で付け替える"""
+    if event['op'] in ('add', 'modify'):
+        record = list(event['record'])
+        record[0] = remap.get(record[0], record[0])
+        event['record'] = record
+    elif event['op'] == 'import':
+        event['records'] = [[remap.get(record[0], record[0])] + list(record[1:])
+                            for record in event['records']]
+    elif event['op'] == 'delete':
+        event['id'] = remap.get(event['id'], event['id'])
+
 
 class StudyTracker:
-    def __init__(self):
-        self.data_file = "study_data.json"
+    # 記録の変更が失敗したときに送出しうる例外（RemoteTracker が通信エラーを指定する）。
+    # 画面側は except tracker.request_errors で受け、ローカルでは何も捕まえない
+    request_errors = ()
+
+    def __init__(self, data_file=None, storage=None):
+        self.data_file = data_file or STORAGE_CONFIG["data_file"]
+        self.storage = storage or create_storage(
+            self.data_file,
+            STORAGE_CONFIG["backend"],
+            STORAGE_CONFIG["compact_every"]
+        )
+        self.batch_events = None  # batch() 中・グループコミット中に保存を保留しているイベント
+        self.batch_save = False
+        # schedule_flush(ミリ秒) で後から flush() を呼べる場合（GUIのafterなど）だけ
+        # group_commit_ms 以内の変更をまとめて書き込む
+        self.group_commit_ms = STORAGE_CONFIG.get("group_commit_ms", 0)
+        self.schedule_flush = None
+        self.events = EventBus()
         self.load_data()
 
     def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                self.exp = data.get('exp', 0)
-                self.level = data.get('level', 1)
-                self.tickets = data.get('tickets', 0)
-                self.study_log = data.get('study_log', [])
+        with self.storage.lock():
+            data, events = self.storage.load()
+        rollups = None
+        if data:
+            self.exp = data.get('exp', 0)
+            self.level = data.get('level', 1)
+            self.tickets = data.get('tickets', 0)
+            self.study_log = StudyLog(data.get('study_log', []))
+            if 'rollups' in data:
+                rollups = Rollups.from_dict(data['rollups'])
         else:
             self.exp = 0
             self.level = 1
             self.tickets = 0
-            self.study_log = []
+            self.study_log = StudyLog()
+        # 以前の版は「件数+1」でIDを振っていたため、削除後のデータにはIDの重複がある。
+        # 毎回同じ振り直しになるので、ジャーナルのイベントとも食い違わない
+        self.study_log.renumber_duplicates()
+        # SQLiteはID順で読み込むため、過去の記録を後から取り込んだデータは日時順に戻す
+        self.study_log.sort_by_time()
+        self.ledger = ExpLedger(self.study_log)
+        # 保存された集計が記録と食い違う場合（古いデータなど）は作り直す
+        if rollups is None or rollups.count() != len(self.study_log):
+            rollups = Rollups.from_log(self.study_log)
+        self.rollups = rollups
+        # ジャーナルに残っている変更を再生
+        for event in events:
+            self.apply_event(event)
+            self.exp, self.level, self.tickets = event['state']
+        self.last_id = max(self.study_log.ids, default=0)
 
-    def save_data(self):
-        data = {
+    def snapshot(self):
+        return {
             'exp': self.exp,
             'level': self.level,
             'tickets': self.tickets,
-            'study_log': self.study_log
+            'study_log': self.study_log.to_rows(),
+            'rollups': self.rollups.to_dict()
         }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f)
 
-    def add_study(self, minutes, subject, difficulty):
+    def save_data(self):
+        if self.batch_events is not None:
+            self.batch_save = True
+            return
+        self.write(save=True)
+
+    def write(self, events=(), save=False):
+        """変更を保存先へ書き込む（他のプロセスが先に保存していれば取り込んでから）
+
+        save が真ならスナップショット全体、偽なら events だけを書き込む。
+        """
+        with self.storage.lock():
+            changes = self.storage.changes()
+            if changes != []:
+                self.merge_changes(changes, events)
+            if save:
+                self.storage.save(self.snapshot())
+            elif events:
+                self.storage.append_many(events, self.snapshot)
+
+    def merge_changes(self, changes, events):
+        """他のプロセスが保存した変更 changes の後ろに、未保存の変更 events を付け直す
+
+        changes が None（差分が分からない）なら保存先から読み込み直す。
+        events で追加した記録は他のプロセスの記録と重ならないIDに振り直し、
+        レベル・EXP・チケットは最後に1回だけ再計算する。
+        """
+        local_ids = sorted(record[0] for event in events for record in added_records(event))
+        tickets_used = lambda events: sum(event['op'] == 'ticket' for event in events)
+        if changes is None:
+            self.load_data()
+            # 使用済みのチケット（再計算で戻らないように最後に差し引く）
+            spent = LEVEL_CURVE.resolve(self.ledger.total())[2] - self.tickets + tickets_used(events)
+        else:
+            spent = LEVEL_CURVE.resolve(self.ledger.total())[2] - self.tickets + tickets_used(changes)
+            # 未保存の追加を外してから他のプロセスの変更を反映
+            removed = self.study_log.remove_ids(local_ids)
+            self.ledger.remove(removed)
+            for record in removed:
+                self.rollups.remove(record)
+            for event in changes:
+                self.apply_event(event)
+
+        next_id = max(self.study_log.ids, default=0) + 1
+        remap = {old: new for new, old in enumerate(local_ids, next_id)}
+        for event in events:
+            remap_ids(event, remap)
+            self.apply_event(event)
+        self.last_id = max(self.study_log.ids, default=0)
+        self.recalculate_stats(skip_save=True)
+        self.tickets = max(0, self.tickets - spent)
+        for event in events:
+            event['state'] = [self.exp, self.level, self.tickets]
+        # IDが変わった記録もあるため、表示はすべて作り直してもらう
+        self.notify(AllReset())
+
+    def commit(self, event):
+        """変更イベントを保存先へ書き込む"""
+        event['state'] = [self.exp, self.level, self.tickets]
+        if self.batch_events is None and self.group_commit_ms and self.schedule_flush:
+            self.batch_events = []
+            self.schedule_flush(self.group_commit_ms)
+        if self.batch_events is not None:
+            self.batch_events.append(event)
+        else:
+            self.write([event])
+
+    @contextmanager
+    def batch(self):
+        """ブロック内の変更をまとめて、最後に1度だけ保存する
+
+        ブロック内で例外が起きた場合は変更を保存せず、保存先から読み込み直す。
+        """
+        if self.batch_events is not None:
+            yield self
+            return
+        self.batch_events = []
+        try:
+            yield self
+        except BaseException:
+            self.batch_events = None
+            self.batch_save = False
+            self.load_data()
+            self.notify(AllReset())
+            raise
+        self.flush()
+
+    def flush(self):
+        """保存を保留している変更を1回で書き込む"""
+        events, self.batch_events = self.batch_events, None
+        if self.batch_save:
+            self.batch_save = False
+            self.write(events or (), save=True)
+        elif events:
+            self.write(events)
+
+    def apply_event(self, event):
+        """イベントを学習記録に反映し、変更通知を返す（EXP等の再計算は行わない）"""
+        op = event['op']
+        if op == 'add':
+            record = tuple(event['record'])
+            self.study_log.append(record)
+            # 日時を指定して過去の記録を追加した場合も記録は日時順に保つ
+            self.study_log.sort_by_time(len(self.study_log) - 1)
+            self.ledger.add(record)
+            self.rollups.add(record)
+            return RecordAdded(record)
+        elif op == 'import':
+            records = [tuple(record) for record in event['records']]
+            start = len(self.study_log)
+            self.study_log.extend(records)
+            # 過去の記録を取り込んだ場合も記録は日時順に保つ
+            self.study_log.sort_by_time(start)
+            self.ledger.add_many(records)
+            self.rollups.add_many(records)
+            return RecordsImported(records)
+        elif op == 'modify':
+            record = tuple(event['record'])
+            old = self.study_log.replace(record)
+            if old:
+                self.ledger.update(old, record)
+                self.rollups.remove(old)
+                self.rollups.add(record)
+                return RecordModified(old, record)
+        elif op in ('delete', 'reset_day'):
+            if op == 'delete':
+                removed = self.study_log.remove_ids([event['id']])
+            else:
+                removed = self.study_log.remove_day(event['date'])
+            self.ledger.remove(removed)
+            for record in removed:
+                self.rollups.remove(record)
+            if op == 'delete':
+                return RecordDeleted(removed)
+            return DayReset(event['date'], removed)
+        elif op == 'reset_all':
+            self.study_log = StudyLog()
+            self.ledger = ExpLedger()
+            self.rollups = Rollups()
+            return AllReset()
+        return None
+
+    def notify(self, change):
+        """変更を購読者へ通知（batch() 中・グループコミット中は保存より先に届く）"""
+        if change is not None:
+            self.events.publish(change)
+
+    def add_study(self, minutes, subject, difficulty, study_date=None):
         earned_exp = minutes * difficulty
         self.exp += earned_exp
-        study_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        self.study_log.append((len(self.study_log) + 1, minutes, subject, earned_exp, study_date))
-        self.check_level_up()
-        self.save_data()
+        study_date = study_date or datetime.now().strftime('%Y-%m-%d %H:%M')
+        self.last_id += 1
+        event = {'op': 'add', 'record': [self.last_id, minutes, subject, earned_exp, study_date]}
+        change = self.apply_event(event)
+        self.check_level_up(skip_save=True)
+        self.commit(event)
+        self.notify(change)
         return earned_exp
 
+    def import_sessions(self, sessions):
+        """(日時, 科目, 学習時間) の一覧をまとめて取り込む
+
+        日時順（同じ日時は元の順）にIDを振って追加し、レベル・EXP・チケットの再計算と
+        保存はそれぞれ1回だけ行う。取り込んだ件数を返す。
+        """
+        # タプル全体より日時だけで比べるほうが大量の記録では速い
+        sessions = sorted(sessions, key=itemgetter(0))
+        unknown = set(map(itemgetter(1), sessions)) - SUBJECTS.keys()
+        if unknown:
+            raise ValueError(f"Unknown subject: {', '.join(sorted(unknown))}")
+        if not sessions:
+            return 0
+        difficulties = {subject: info["difficulty"] for subject, info in SUBJECTS.items()}
+        # 列ごとにまとめて計算してから記録のタプルにする
+        study_dates, subjects, minutes = zip(*sessions)
+        exps = map(mul, minutes, map(difficulties.__getitem__, subjects))
+        records = list(zip(range(self.last_id + 1, self.last_id + 1 + len(sessions)),
+                           minutes, subjects, exps, study_dates))
+        self.last_id += len(records)
+        event = {'op': 'import', 'records': records}
+        change = self.apply_event(event)
+        self.recalculate_stats(skip_save=True)
+        self.commit(event)
+        self.notify(change)
+        return len(records)
+
     def check_level_up(self, skip_save=False):
-        required_exp = 100 * (self.level ** 1.5)
-        while self.exp >= required_exp:
-            self.level += 1
-            self.tickets += 1
-            self.exp -= required_exp
-            required_exp = 100 * (self.level ** 1.5)
+        self.level, self.exp, gained = LEVEL_CURVE.level_up(self.level, self.exp)
+        self.tickets += gained
         if not skip_save:
             self.save_data()
 
     def use_ticket(self):
         if self.tickets > 0:
             self.tickets -= 1
-            self.save_data()
+            self.commit({'op': 'ticket'})
+            self.notify(TicketUsed(self.tickets))
             return True
         return False
 
     def reset_day(self, target_date):
-        self.study_log = [log for log in self.study_log if log[4].split()[0] != target_date]
-        self.recalculate_stats()
+        event = {'op': 'reset_day', 'date': target_date}
+        change = self.apply_event(event)
+        self.recalculate_stats(skip_save=True)
+        self.commit(event)
+        self.notify(change)
 
     def modify_record(self, record_id, minutes, subject, difficulty):
-        for i, log in enumerate(self.study_log):
-            if log[0] == record_id:
-                new_exp = minutes * difficulty
-                self.study_log[i] = (record_id, minutes, subject, new_exp, log[4])
-                break
-        self.recalculate_stats()
-
-    def recalculate_stats(self):
-        self.exp = 0
-        self.level = 1
-        self.tickets = 0
-        sorted_log = sorted(self.study_log, key=lambda x: x[4])
-        for log in sorted_log:
-            self.exp += log[3]
-            self.check_level_up(skip_save=True)
-        self.save_data()
+        log = self.study_log.find(record_id)
+        if log is not None:
+            new_exp = minutes * difficulty
+            event = {'op': 'modify', 'record': [record_id, minutes, subject, new_exp, log[4]]}
+            change = self.apply_event(event)
+            self.recalculate_stats(skip_save=True)
+            self.commit(event)
+            self.notify(change)
+
+    def delete_record(self, record_id):
+        """指定IDの記録を削除"""
+        event = {'op': 'delete', 'id': record_id}
+        change = self.apply_event(event)
+        self.recalculate_stats(skip_save=True)
+        self.commit(event)
+        self.notify(change)
+
+    def recalculate_stats(self, skip_save=False):
+        """累積EXPからレベル・EXP・チケットを再計算"""
+        self.level, self.exp, self.tickets = LEVEL_CURVE.resolve(self.ledger.total())
+        if not skip_save:
+            self.save_data()
+
+    @property
+    def version(self):
+        """学習記録の版番号（記録が変更されるたびに変わる）"""
+        return self.study_log.version
+
+    def time_columns(self):
+        """日時を解析済みの列データ（記録が変更されるまで共有）"""
+        return self.study_log.time_columns()
+
+    def newest_first(self):
+        """日時の新しい順に並べた記録の位置（記録が変更されるまで共有）"""
+        return self.study_log.newest_first()
+
+    # 集計（保存方式が対応していればそちらで計算）
+    def storage_query(self, name):
+        """保存先の集計クエリ（batch() で保存を保留している間は使わない）"""
+        if self.batch_events is None:
+            return getattr(self.storage, name, None)
+        return None
+
+    def find_record(self, record_id):
+        """指定IDの記録を取得"""
+        query = self.storage_query('find_record')
+        if query:
+            return query(record_id)
+        return self.study_log.find(record_id)
+
+    def totals(self):
+        """総学習時間と総獲得EXP"""
+        query = self.storage_query('totals')
+        if query:
+            return query()
+        buckets = self.rollups.subjects.values()
+        return sum(bucket[1] for bucket in buckets), sum(bucket[2] for bucket in buckets)
+
+    def subject_totals(self):
+        """科目ごとの学習時間とEXP"""
+        query = self.storage_query('subject_totals')
+        if query:
+            return query()
+        return {subject: {'time': minutes, 'exp': exp}
+                for subject, (_, minutes, exp) in self.rollups.subjects.items()}
+
+    def daily_totals(self):
+        """日付ごとの学習時間とEXP（日付順）"""
+        query = self.storage_query('daily_totals')
+        if query:
+            return query()
+        return [(to_date(day).isoformat(), minutes, exp)
+                for day, (_, minutes, exp) in sorted(self.rollups.days.items())]
 
     def reset_all(self):
         """全データをリセット"""
         self.exp = 0
         self.level = 1
         self.tickets = 0
-        self.study_log = []
-        self.save_data()
-        return True
\ No newline at end of file
+        event = {'op': 'reset_all'}
+        change = self.apply_event(event)
+        self.last_id = 0
+        if self.batch_events is not None:
+            self.batch_events.append(event)
+            self.batch_save = True
+        else:
+            # 他のプロセスの変更を取り込んだ後でもすべて消えるよう、イベントとして渡す
+            self.write([event], save=True)
+        self.notify(change)
+        return True
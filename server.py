@@ -0,0 +1,394 @@
+"""1つの StudyTracker を複数のクライアントで共有するローカルHTTP/JSONサーバー
+
+使い方:
+    python -m server                       （127.0.0.1:8765）
+    python -m server --profile 花子 --port 9000
+    python main.py --server http://127.0.0.1:8765   （GUIをクライアントとして使う）
+
+記録の変更は1つの書き込みタスクが受け付け順に実行し、集計の取得は
+変更があるまでキャッシュした結果を書き込みを待たずに返す。
+
+    GET    /stats?days=N              ステータスと集計（cli stats --json と同じ）
+    GET    /daily?days=N              日付ごとの学習時間とEXP
+    GET    /records?date=YYYY-MM-DD   指定日の記録
+    GET    /predict?subject=&targets=10,20
+    GET    /snapshot                  全データ（クライアントの初回読み込み用）
+    GET    /events?since=N            N番より後の変更
+    POST   /study                     {"minutes", "subject", "studied_at"（省略可）}
+    POST   /import                    {"sessions": [[studied_at, subject, minutes], ...]}
+    POST   /ticket
+    PUT    /records/<id>              {"minutes", "subject"（省略可）}
+    DELETE /records/<id>
+    POST   /reset-day                 {"date"}
+    POST   /reset-all
+
+変更系のURLに ?since=N を付けると、応答の events に N番より後の変更が入る。
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from cli import CommandError, add_tracker_arguments, collect_stats, open_tracker
+from models.events import RECORD_EVENTS, TicketUsed
+from models.profiles import ProfileIndex
+from models.study_log import StudyLog
+from models.study_tracker import StudyTracker
+from utils.config import SERVER_CONFIG, SUBJECTS, PREDICTION_CONFIG
+from utils.export import FIELDS, iter_rows
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+class ApiError(Exception):
+    """クライアントへエラーとして返す例外"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServedTracker(StudyTracker):
+    """変更イベントに通し番号を付けて直近 history 件を残す StudyTracker"""
+
+    def __init__(self, data_file=None, storage=None, history=None):
+        self.seq = 0
+        self.changes = deque(maxlen=history or SERVER_CONFIG["history"])
+        super().__init__(data_file, storage)
+
+    def commit(self, event):
+        super().commit(event)
+        self.record_change(event)
+
+    def reset_all(self):
+        result = super().reset_all()
+        self.record_change({'op': 'reset_all', 'state': [self.exp, self.level, self.tickets]})
+        return result
+
+    def merge_changes(self, changes, events):
+        super().merge_changes(changes, events)
+        # 他のプロセスの変更は配信できないため、クライアントには読み込み直してもらう
+        self.seq += 1
+        self.changes.clear()
+
+    def record_change(self, event):
+        self.seq += 1
+        self.changes.append((self.seq, event))
+
+    def changes_since(self, seq):
+        """seq 番より後の変更（古すぎて残っていなければ None）"""
+        if seq >= self.seq:
+            return []
+        if not self.changes or seq < self.changes[0][0] - 1:
+            return None
+        return [event for number, event in self.changes if number > seq]
+
+
+def query_int(query, name, default=None):
+    if name not in query:
+        return default
+    try:
+        return int(query[name])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+
+def body_minutes(body):
+    minutes = body.get('minutes')
+    # JSON の true/false も Python では int のため除く
+    if not isinstance(minutes, int) or isinstance(minutes, bool) or minutes <= 0:
+        raise ApiError(400, "minutes must be a positive integer")
+    return minutes
+
+
+def body_subject(body, default=None):
+    subject = body.get('subject', default)
+    if subject not in SUBJECTS:
+        raise ApiError(400, f"Unknown subject: {subject}")
+    return subject
+
+
+def body_time(body, name, fmt):
+    text = body.get(name)
+    try:
+        return datetime.strptime(text, fmt).strftime(fmt)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be {fmt}")
+
+
+class TrackerServer:
+    """ServedTracker をHTTP/JSONで公開する
+
+    tracker の変更は queue 経由で writer() だけが行う。読み込み系は
+    イベントループ上で直接（変更の途中に割り込むことはない）キャッシュから返し、
+    時間のかかる予測は記録の複製を使って別スレッドで計算する。
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.queue = None
+        self.cache = {}
+        # 記録・チケットが変わったら集計のキャッシュを破棄
+        tracker.events.subscribe(RECORD_EVENTS + (TicketUsed,), lambda event: self.cache.clear())
+        self.routes = [
+            ('GET', re.compile(r'/stats'), self.get_stats),
+            ('GET', re.compile(r'/daily'), self.get_daily),
+            ('GET', re.compile(r'/records'), self.get_records),
+            ('GET', re.compile(r'/predict'), self.get_predict),
+            ('GET', re.compile(r'/snapshot'), self.get_snapshot),
+            ('GET', re.compile(r'/events'), self.get_events),
+            ('POST', re.compile(r'/study'), self.post_study),
+            ('POST', re.compile(r'/import'), self.post_import),
+            ('POST', re.compile(r'/ticket'), self.post_ticket),
+            ('PUT', re.compile(r'/records/(\d+)'), self.put_record),
+            ('DELETE', re.compile(r'/records/(\d+)'), self.delete_record),
+            ('POST', re.compile(r'/reset-day'), self.post_reset_day),
+            ('POST', re.compile(r'/reset-all'), self.post_reset_all),
+        ]
+
+    # 書き込み
+    async def writer(self):
+        """queue の変更を1件ずつ順に実行する"""
+        while True:
+            func, args, future = await self.queue.get()
+            try:
+                result = func(*args)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    def submit(self, func, *args):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((func, args, future))
+        return future
+
+    def schedule_flush(self, ms):
+        # グループコミットの書き込みも他の変更と同じ順番待ちに入れる
+        loop = asyncio.get_running_loop()
+        loop.call_later(ms / 1000, lambda: self.submit(self.tracker.flush).add_done_callback(
+            lambda future: future.exception()))
+
+    async def mutate(self, query, func, *args):
+        """変更を書き込みタスクで実行し、結果と（?since=N があれば）差分を返す"""
+        since = query_int(query, 'since')
+        try:
+            result = await self.submit(func, *args)
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        response = {'result': result, 'seq': self.tracker.seq}
+        if since is not None:
+            response['events'] = self.tracker.changes_since(since)
+        return response
+
+    # 読み込み（キャッシュ）
+    def cached(self, key, build):
+        if key not in self.cache:
+            self.cache[key] = build()
+        return self.cache[key]
+
+    async def get_stats(self, query, body):
+        days = query_int(query, 'days')
+        return self.cached(('stats', days), lambda: collect_stats(self.tracker, days))
+
+    async def get_daily(self, query, body):
+        days = query_int(query, 'days')
+        daily = self.cached('daily', lambda: [
+            {'date': day, 'minutes': minutes, 'exp': exp}
+            for day, minutes, exp in self.tracker.daily_totals()])
+        return daily[-days:] if days else daily
+
+    async def get_records(self, query, body):
+        date = body_time(query, 'date', '%Y-%m-%d')
+        return self.cached(('records', date), lambda: [
+            dict(zip(FIELDS, row))
+            for row in iter_rows(self.tracker.study_log, start=date, end=date)])
+
+    async def get_predict(self, query, body):
+        subject = query.get('subject')
+        if subject is not None and subject not in SUBJECTS:
+            raise ApiError(400, f"Unknown subject: {subject}")
+        try:
+            targets = [int(target) for target in query['targets'].split(',')] \
+                if 'targets' in query else PREDICTION_CONFIG["target_hours"]
+        except ValueError:
+            raise ApiError(400, "targets must be comma-separated integers")
+        if len(self.tracker.study_log) < 5:
+            raise ApiError(400, "At least 5 records are needed for predictions")
+        # 分析用の DataFrame 作成は重いため、記録の複製から別スレッドで作る
+        future = self.cached('analytics', self.build_analytics)
+        try:
+            # 要求が途中で切れても、他の要求と共有している作成中の結果は取り消さない
+            session = await asyncio.shield(future)
+        except Exception:
+            # 失敗した結果はキャッシュに残さず、次の要求で作り直す
+            if self.cache.get('analytics') is future:
+                del self.cache['analytics']
+            raise
+        subjects = [subject] if subject else list(SUBJECTS)
+        predictions = session.predict_all(subjects, targets)
+        if subject:
+            predictions.pop(None)
+        return {subject or 'all': dict(days) for subject, days in predictions.items()}
+
+    def build_analytics(self):
+        from utils.analytics import AnalyticsSession
+        study_log = StudyLog(self.tracker.study_log.to_rows())
+        loop = asyncio.get_running_loop()
+        return asyncio.ensure_future(loop.run_in_executor(None, AnalyticsSession, study_log))
+
+    async def get_snapshot(self, query, body):
+        return {'seq': self.tracker.seq, 'data': self.tracker.snapshot()}
+
+    async def get_events(self, query, body):
+        since = query_int(query, 'since', 0)
+        return {'seq': self.tracker.seq, 'events': self.tracker.changes_since(since)}
+
+    # 変更
+    async def post_study(self, query, body):
+        minutes = body_minutes(body)
+        subject = body_subject(body)
+        studied_at = None
+        if 'studied_at' in body:
+            studied_at = body_time(body, 'studied_at', '%Y-%m-%d %H:%M')
+        return await self.mutate(query, self.tracker.add_study,
+                                 minutes, subject, SUBJECTS[subject]["difficulty"], studied_at)
+
+    async def post_import(self, query, body):
+        try:
+            sessions = [(studied_at, subject, minutes)
+                        for studied_at, subject, minutes in body['sessions']]
+        except (KeyError, TypeError, ValueError):
+            raise ApiError(400, "sessions must be a list of [studied_at, subject, minutes]")
+        for studied_at, subject, minutes in sessions:
+            body_minutes({'minutes': minutes})
+            body_time({'studied_at': studied_at}, 'studied_at', '%Y-%m-%d %H:%M')
+        return await self.mutate(query, self.tracker.import_sessions, sessions)
+
+    async def post_ticket(self, query, body):
+        return await self.mutate(query, self.tracker.use_ticket)
+
+    async def put_record(self, query, body, record_id):
+        record = self.tracker.find_record(int(record_id))
+        if record is None:
+            raise ApiError(404, f"Record not found: {record_id}")
+        minutes = body_minutes(body)
+        subject = body_subject(body, record[2])
+        return await self.mutate(query, self.tracker.modify_record, int(record_id),
+                                 minutes, subject, SUBJECTS[subject]["difficulty"])
+
+    async def delete_record(self, query, body, record_id):
+        if self.tracker.find_record(int(record_id)) is None:
+            raise ApiError(404, f"Record not found: {record_id}")
+        return await self.mutate(query, self.tracker.delete_record, int(record_id))
+
+    async def post_reset_day(self, query, body):
+        date = body_time(body, 'date', '%Y-%m-%d')
+        return await self.mutate(query, self.tracker.reset_day, date)
+
+    async def post_reset_all(self, query, body):
+        return await self.mutate(query, self.tracker.reset_all)
+
+    # HTTP
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match and route_method == method:
+                try:
+                    body = json.loads(body) if body else {}
+                except ValueError:
+                    raise ApiError(400, "Request body must be JSON")
+                if not isinstance(body, dict):
+                    raise ApiError(400, "Request body must be a JSON object")
+                return await handler(query, body, *match.groups())
+        raise ApiError(404, f"No route for {method} {url.path}")
+
+    async def handle(self, reader, writer):
+        """1つの接続のリクエストを順に処理（HTTP/1.1 の keep-alive に対応）"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                    body = await reader.readexactly(int(headers.get('content-length', 0)))
+                    status, payload = 200, await self.dispatch(method, target, body)
+                except ApiError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError:
+                    status, payload, version = 400, {'error': "Malformed request"}, 'HTTP/1.0'
+                except Exception as e:
+                    status, payload = 500, {'error': repr(e)}
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection') != 'close'
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        self.queue = asyncio.Queue()
+        self.tracker.schedule_flush = self.schedule_flush
+        writer_task = asyncio.create_task(self.writer())
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self.tracker.schedule_flush = None
+            self.tracker.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m server", description="StudyTracker のローカルHTTP/JSONサーバー")
+    add_tracker_arguments(parser)
+    parser.add_argument('--host', default=SERVER_CONFIG["host"])
+    parser.add_argument('--port', type=int, default=SERVER_CONFIG["port"])
+    args = parser.parse_args(argv)
+    profiles = ProfileIndex()
+    try:
+        profile, tracker = open_tracker(args, profiles, ServedTracker)
+    except CommandError as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    server = TrackerServer(tracker)
+    print(f"http://{args.host}:{args.port} で待ち受けています（Ctrl+C で終了）")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    if profile is not None:
+        profiles.update_summary(profile, tracker)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
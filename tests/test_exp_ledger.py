@@ -0,0 +1,12 @@
+from models.exp_ledger import ExpLedger
+from models.study_log import StudyLog
+from .test_study_log import RECORDS, history, traced_size
+
+EXP_LEDGER_BYTES = 4096
+
+
+def test_exp_ledger_memory():
+    study_log = StudyLog(history(RECORDS))
+    ledger, size = traced_size(lambda: ExpLedger(study_log))
+    assert ledger.total() == RECORDS * 30.0
+    assert size < EXP_LEDGER_BYTES
@@ -0,0 +1,44 @@
+import io
+import pytest
+from models.storage import create_storage
+from models.study_tracker import StudyTracker
+from utils.importer import SessionError, parse_session, read_csv
+
+
+def test_import_keeps_time_order(tmp_path):
+    """過去の記録を後から取り込んでも、記録は日時順に並ぶ（SQLiteから読み直しても同じ）"""
+    data_file = str(tmp_path / 'study_data.db')
+    tracker = StudyTracker(data_file, storage=create_storage(data_file, 'sqlite'))
+    tracker.add_study(30, 'English', 1.0, '2024-05-10 10:00')
+    tracker.add_study(30, 'English', 1.0, '2024-05-11 10:00')
+    tracker.import_sessions([('2024-05-01 09:00', 'Mathematics', 60),
+                             ('2024-05-02 09:00', 'Mathematics', 60)])
+    tracker.add_study(15, 'English', 1.0, '2024-04-30 08:00')
+    expected = ['2024-04-30 08:00', '2024-05-01 09:00', '2024-05-02 09:00',
+                '2024-05-10 10:00', '2024-05-11 10:00']
+    assert [record[4] for record in tracker.study_log] == expected
+    assert tracker.study_log[-1][0] == 2
+
+    reloaded = StudyTracker(data_file, storage=create_storage(data_file, 'sqlite'))
+    assert [record[4] for record in reloaded.study_log] == expected
+
+
+def test_read_csv_matches_row_by_row():
+    """まとめて検証した結果は1行ずつの検証と同じで、誤りのある行は行番号付きで報告する"""
+    lines = ['memo,studied_at,subject,minutes',
+             'a,2024-05-01 09:00,English,30',
+             'b, 2024-05-02T10:15:00 ,Mathematics,45',
+             '',
+             'c,2024-05-03 11:30,English,60']
+    sessions = read_csv(io.StringIO('\n'.join(lines)))
+    assert sessions == [('2024-05-01 09:00', 'English', 30),
+                        ('2024-05-02 10:15', 'Mathematics', 45),
+                        ('2024-05-03 11:30', 'English', 60)]
+    assert sessions == [parse_session(line, *row) for line, row in
+                        enumerate([['2024-05-01 09:00', 'English', '30'],
+                                   [' 2024-05-02T10:15:00 ', 'Mathematics', '45'],
+                                   ['2024-05-03 11:30', 'English', '60']], 2)]
+
+    lines[4] = 'c,2024-02-30 11:30,English,60'
+    with pytest.raises(SessionError, match='^5行目: 存在しない日付です'):
+        read_csv(io.StringIO('\n'.join(lines)))
@@ -0,0 +1,59 @@
+import os
+from models.storage import JournalStorage
+from models.study_tracker import StudyTracker
+
+
+def open_tracker(data_file, compact_every=500):
+    return StudyTracker(data_file, storage=JournalStorage(data_file, compact_every))
+
+
+def dates(tracker):
+    return [record[4] for record in tracker.study_log]
+
+
+def test_journal_replay(tmp_path):
+    """スナップショットがなくてもジャーナルの再生で同じ状態に戻る"""
+    data_file = str(tmp_path / 'study_data.json')
+    tracker = open_tracker(data_file)
+    tracker.add_study(30, 'English', 1.0, '2024-05-01 10:00')
+    tracker.add_study(60, 'Mathematics', 1.0, '2024-05-02 10:00')
+    tracker.modify_record(1, 45, 'English', 1.0)
+    tracker.delete_record(2)
+    assert not os.path.exists(data_file)
+
+    reloaded = open_tracker(data_file)
+    assert list(reloaded.study_log) == list(tracker.study_log)
+    assert (reloaded.exp, reloaded.level, reloaded.tickets) == \
+        (tracker.exp, tracker.level, tracker.tickets)
+
+
+def test_journal_compaction(tmp_path):
+    """compact_every 件ごとにスナップショットへまとめ、ジャーナルを空にする"""
+    data_file = str(tmp_path / 'study_data.json')
+    tracker = open_tracker(data_file, compact_every=3)
+    for day in range(1, 5):
+        tracker.add_study(30, 'English', 1.0, f'2024-05-0{day} 10:00')
+    assert os.path.exists(data_file)
+    assert os.path.getsize(tracker.storage.journal_file) > 0
+
+    reloaded = open_tracker(data_file, compact_every=3)
+    assert dates(reloaded) == dates(tracker)
+    assert reloaded.exp == tracker.exp
+
+
+def test_torn_journal_line(tmp_path):
+    """追記の途中で終了した末尾行の後に追記しても、以降のイベントを失わない"""
+    data_file = str(tmp_path / 'study_data.json')
+    tracker = open_tracker(data_file)
+    tracker.add_study(30, 'English', 1.0, '2024-05-01 10:00')
+    tracker.add_study(30, 'English', 1.0, '2024-05-02 10:00')
+    with open(tracker.storage.journal_file, 'ab') as f:
+        f.write(b'{"op": "add", "rec')
+
+    tracker = open_tracker(data_file)
+    tracker.add_study(30, 'English', 1.0, '2024-05-03 10:00')
+    tracker.add_study(30, 'English', 1.0, '2024-05-04 10:00')
+    assert len(tracker.study_log) == 4
+
+    reloaded = open_tracker(data_file)
+    assert dates(reloaded) == dates(tracker)
@@ -0,0 +1,111 @@
+import gc
+import threading
+import tkinter as tk
+import tracemalloc
+import pytest
+from models.storage import JsonStorage
+from models.study_tracker import StudyTracker
+from views.chart_renderer import RENDERER
+from views.figures import FIGURES
+from views.stats.analysis_view import AnalysisView
+from views.stats.subject_view import SubjectView
+
+WARMUP = 2
+CYCLES = 2
+# 開き直すたびにFigure（12x10インチ・100dpiのキャンバスで数MB）が残れば大きく超える
+GROWTH_BYTES = 1024 * 1024
+
+
+def open_tracker(tmp_path):
+    data_file = str(tmp_path / 'study_data.json')
+    tracker = StudyTracker(data_file, storage=JsonStorage(data_file))
+    subjects = ['English', 'Mathematics', 'プログラミング']
+    tracker.import_sessions([(f"2024-{1 + day // 28:02d}-{1 + day % 28:02d} {8 + day % 12:02d}:00",
+                              subjects[day % 3], 30 + day % 60) for day in range(300)])
+    return tracker
+
+
+def retained_growth(cycle):
+    """cycle() を繰り返したとき、確保されたまま増えていくメモリ（バイト）
+
+    初回の作成やキャッシュは WARMUP 回で済ませ、その後の CYCLES 回で
+    確保されたまま残った分だけを数える（追跡を始めた直後の1回は、追跡前に
+    作られたものの置き換わりが増加に見えるため数えない）。
+    """
+    for _ in range(WARMUP):
+        cycle()
+    tracemalloc.start()
+    try:
+        cycle()
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(CYCLES):
+            cycle()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def wait_for_worker():
+    """グラフのワーカースレッドが受け取った処理（解放を含む）を終えるまで待つ"""
+    done = threading.Event()
+    RENDERER.submit(done.set)
+    assert done.wait(30)
+
+
+def test_analysis_figures_memory(tmp_path):
+    """分析グラフを作成・描画・解放し直しても、Figureもメモリも増えない（Aggのみ）"""
+    tracker = open_tracker(tmp_path)
+    view = AnalysisView.__new__(AnalysisView)
+    view.tracker = tracker
+    rollups = tracker.rollups
+    draws = [
+        lambda: view.draw_progress_graph(
+            rollups.last('days', 7), rollups.last('weeks', 8), rollups.last('months', 12)),
+        lambda: view.draw_time_analysis(tracker.time_columns()),
+    ]
+
+    def cycle():
+        # ChartRenderer がワーカースレッドで行うのと同じ作成・ラスタライズ・解放
+        for draw in draws:
+            RENDERER.rasterize(draw, None)
+            _, fig, image, error = RENDERER.results.get()
+            assert error is None
+            FIGURES.release(fig)
+
+    assert retained_growth(cycle) < GROWTH_BYTES
+    assert set(FIGURES.figures) >= {'progress', 'time_analysis'}
+    figures = len(FIGURES.figures)
+    cycle()
+    assert len(FIGURES.figures) == figures
+
+
+def test_stats_window_memory(tmp_path):
+    """統計ウィンドウ（科目別・分析タブ）を何度開いて閉じても、メモリが増え続けない"""
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("ディスプレイがないためTkを使えない")
+    root.withdraw()
+    tracker = open_tracker(tmp_path)
+
+    def cycle():
+        window = tk.Toplevel(root)
+        SubjectView(tk.Frame(window), tracker)
+        frame = tk.Frame(window)
+        frame.pack()
+        view = AnalysisView(frame, tracker)
+        for index in range(2):
+            view.sub_notebook.select(index)
+            root.update()
+        while RENDERER.pending:
+            root.update()
+        window.destroy()
+        root.update()
+        wait_for_worker()
+
+    try:
+        assert retained_growth(cycle) < GROWTH_BYTES
+    finally:
+        root.destroy()
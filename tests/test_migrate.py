@@ -0,0 +1,38 @@
+import json
+import sqlite3
+from models.migrate import migrate_json_to_sqlite
+from models.storage import JsonStorage
+from models.study_tracker import StudyTracker
+
+
+def write_legacy_data(path):
+    """以前の版（IDは件数+1）で削除後に追加したため、ID 2 が重複したデータ"""
+    study_log = [
+        [1, 30, 'English', 30.0, '2024-05-01 10:00'],
+        [2, 60, 'English', 60.0, '2024-05-02 10:00'],
+        [2, 45, 'Mathematics', 67.5, '2024-05-03 10:00'],
+    ]
+    with open(path, 'w') as f:
+        json.dump({'exp': 57.5, 'level': 2, 'tickets': 1, 'study_log': study_log}, f)
+
+
+def test_load_renumbers_duplicate_ids(tmp_path):
+    data_file = str(tmp_path / 'study_data.json')
+    write_legacy_data(data_file)
+    tracker = StudyTracker(data_file, storage=JsonStorage(data_file))
+    assert list(tracker.study_log.ids) == [1, 2, 3]
+    assert tracker.find_record(3)[2] == 'Mathematics'
+    tracker.add_study(10, 'English', 1.0, '2024-05-04 10:00')
+    assert tracker.last_id == 4
+
+
+def test_migrate_duplicate_ids(tmp_path):
+    data_file = str(tmp_path / 'study_data.json')
+    db_file = str(tmp_path / 'study_data.db')
+    write_legacy_data(data_file)
+    assert migrate_json_to_sqlite(data_file, db_file) == 3
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT id, subject FROM records ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [(1, 'English'), (2, 'English'), (3, 'Mathematics')]
+    assert not (tmp_path / 'study_data.db.tmp').exists()
@@ -0,0 +1,31 @@
+import threading
+from models.profiles import ProfileIndex
+from models.storage import JsonStorage
+from models.study_tracker import StudyTracker
+
+
+def test_summary_keeps_profiles_added_elsewhere(tmp_path):
+    """GUIが一覧を書き出しても、別のプロセス（CLIなど）で追加した学習者は消えない"""
+    index_file = str(tmp_path / 'profiles' / 'index.json')
+    gui = ProfileIndex(index_file)
+    ProfileIndex(index_file).create('Hanako')
+
+    data_file = str(tmp_path / 'study_data.json')
+    tracker = StudyTracker(data_file, storage=JsonStorage(data_file))
+    tracker.add_study(30, 'English', 1.0, '2024-05-01 10:00')
+    gui.update_summary(gui.default, tracker)
+
+    assert ProfileIndex(index_file).names() == [gui.default, 'Hanako']
+    assert gui.profiles[gui.default]['total_minutes'] == 30
+
+
+def test_concurrent_create(tmp_path):
+    index_file = str(tmp_path / 'profiles' / 'index.json')
+    names = [f"learner{number}" for number in range(8)]
+    threads = [threading.Thread(target=ProfileIndex(index_file).create, args=(name,))
+               for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ProfileIndex(index_file).names()[1:]) == names
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 3
+# 起動時に読み込む main（と views.app）の import 時間の上限（秒）
+IMPORT_BUDGET = 0.3
+# 統計ウィンドウを開くまで読み込まないモジュール
+DEFERRED_MODULES = ['numpy', 'pandas', 'matplotlib', 'sklearn']
+# サーバーのクライアントとして動くとき（--server）だけ読み込むモジュール
+CLIENT_MODULES = ['models.remote', 'urllib.request']
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+def measure_import():
+    """新しいプロセスで main を読み込み、最も速かった回の結果を返す"""
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, '-c', MEASURE], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    return min(results, key=lambda result: result['elapsed'])
+
+
+def test_cold_start_import():
+    result = measure_import()
+    loaded = [name for name in DEFERRED_MODULES + CLIENT_MODULES if name in result['modules']]
+    assert loaded == []
+    assert result['elapsed'] < IMPORT_BUDGET
@@ -0,0 +1,44 @@
+import tracemalloc
+import pytest
+from models.study_log import StudyLog, day_number, day_text
+
+RECORDS = 100_000
+# 列ごとの配列は1件あたり 4+4+2+8+8=26 バイト（従来のタプルのリストは約88バイト）
+STUDY_LOG_BYTES_PER_RECORD = 32
+
+
+def history(records):
+    for record_id in range(1, records + 1):
+        day = record_id % 1000
+        yield (record_id, 30, 'English', 30.0,
+               f"{2020 + day // 336}-{1 + day // 28 % 12:02d}-{1 + day % 28:02d} "
+               f"{6 + record_id % 18:02d}:{record_id % 60:02d}")
+
+
+def traced_size(build):
+    """build() の戻り値が確保したままのメモリ（バイト）"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        value = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return value, size
+
+
+def test_study_log_memory():
+    rows = list(history(RECORDS))
+    study_log, size = traced_size(lambda: StudyLog(rows))
+    assert len(study_log) == RECORDS
+    assert size < RECORDS * STUDY_LOG_BYTES_PER_RECORD
+
+
+def test_day_number_rejects_malformed_dates():
+    """形式の違う日付は変換せず、キャッシュ（day_text の戻り値）にも残さない"""
+    for text in ['2024-05-011', '2024-5-01', '2024/05/01', ' 2024-05-0']:
+        with pytest.raises(ValueError):
+            day_number(text)
+    study_log = StudyLog([(1, 30, 'English', 30.0, '2024-05-01 10:00')])
+    assert study_log[0][4] == '2024-05-01 10:00'
+    assert day_text(day_number('2024-05-01')) == '2024-05-01'
@@ -1,34 +1,103 @@
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from datetime import datetime
 import numpy as np
+from models.study_log import StudyLog
 
 def prepare_study_data(study_log):
     """学習データの準備"""
     if not study_log:
         return None
     
-    df = pd.DataFrame([
-        {
-            'date': datetime.strptime(log[4], '%Y-%m-%d %H:%M'),
-            'minutes': log[1],
-            'subject': log[2],
-            'exp': log[3]
-        }
-        for log in study_log
-    ])
+    if not isinstance(study_log, StudyLog):
+        study_log = StudyLog(study_log)
+    columns = study_log.time_columns()
+    df = pd.DataFrame({
+        'date': columns['time'].astype('datetime64[s]'),
+        'minutes': columns['minutes'],
+        'subject': np.array(columns['subjects'], dtype=object)[columns['subject_code']],
+        'exp': columns['exp']
+    })
     
-    df['days_from_start'] = (df['date'] - df['date'].min()).dt.days
-    df['weekday'] = df['date'].dt.weekday
-    df['hour'] = df['date'].dt.hour
+    df['days_from_start'] = (columns['date'] - columns['date'].min()).astype(np.int64)
+    df['weekday'] = columns['weekday']
+    df['hour'] = columns['hour']
     
     return df
 
+def time_histograms(columns, by_subject=False):
+    """曜日×時間帯の学習時間（分）を1回の集計で求める
+
+    columns は StudyLog.time_columns() の列。戻り値の 'heatmap' は
+    (7, 24) の行列（by_subject=True なら (科目数, 7, 24)）で、
+    'hourly' と 'weekday' はそれを時間帯別・曜日別に合計したもの。
+    """
+    cells = columns['weekday'].astype(np.intp) * 24 + columns['hour']
+    shape = (7, 24)
+    if by_subject:
+        shape = (len(columns['subjects']),) + shape
+        cells = cells + columns['subject_code'].astype(np.intp) * (7 * 24)
+    heatmap = np.bincount(cells, weights=columns['minutes'],
+                          minlength=int(np.prod(shape))).reshape(shape)
+    return {
+        'heatmap': heatmap,
+        'hourly': heatmap.sum(axis=-2),
+        'weekday': heatmap.sum(axis=-1)
+    }
+
+def downsample_trend(columns, max_points, start=None, end=None):
+    """学習時間推移を描画用に間引く
+
+    表示期間（start〜end、datetime64）の記録が max_points 件以下ならそのまま、
+    多ければ期間の長さから日・週・月・年のうち max_points 以内に収まる
+    最も細かい単位を選び、バケットごとの平均・最小・最大を返す。
+    """
+    times = columns['time']
+    minutes = columns['minutes']
+    if start is not None or end is not None:
+        mask = np.ones(len(times), dtype=bool)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times <= end
+        times, minutes = times[mask], minutes[mask]
+    if len(times) <= max_points:
+        return {'unit': 'session', 'time': times, 'mean': minutes, 'min': None, 'max': None}
+
+    days = times.astype('datetime64[D]')
+    span = int((days.max() - days.min()).astype(np.int64)) + 1
+    for unit, unit_days in (('day', 1), ('week', 7), ('month', 31), ('year', 366)):
+        if span / unit_days <= max_points:
+            break
+    if unit == 'day':
+        keys = days
+    elif unit == 'week':
+        # 月曜日始まりの週（1970-01-01 は木曜日）
+        day_numbers = days.astype(np.int64)
+        keys = (day_numbers - (day_numbers + 3) % 7).astype('datetime64[D]')
+    elif unit == 'month':
+        keys = times.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        keys = times.astype('datetime64[Y]').astype('datetime64[D]')
+
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], minutes[order].astype(np.float64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    return {
+        'unit': unit,
+        'time': keys[starts],
+        'mean': np.add.reduceat(values, starts) / counts,
+        'min': np.minimum.reduceat(values, starts),
+        'max': np.maximum.reduceat(values, starts)
+    }
+
 def create_prediction_model(df):
     """予測モデルの作成"""
     if df is None or len(df) < 5:
         return None, "予測するには最低5件の学習記録が必要です"
 
+    # scikit-learn は読み込みが重いため、モデルを作るときだけ読み込む
+    from sklearn.linear_model import LinearRegression
+
     # 特徴量の準備
     df_encoded = pd.get_dummies(df, columns=['subject'])
     features = ['days_from_start', 'weekday', 'hour'] + [col for col in df_encoded.columns if col.startswith('subject_')]
@@ -64,55 +133,76 @@ def predict_achievement_dates(model, current_data, target_hours):
     
     return predictions
 
+def predict_days(current_total, daily_average, target_hours):
+    """目標時間ごとの到達日数（未到達の目標のみ）"""
+    targets = np.asarray(target_hours)
+    targets = targets[targets > current_total]
+    if daily_average > 0:
+        days = ((targets - current_total) / daily_average).astype(np.int64)
+    else:
+        days = np.full(len(targets), 999999)
+    return list(zip(targets.tolist(), np.maximum(1, days).tolist()))
+
+class AnalyticsSession:
+    """学習記録の1つの版に対する分析
+
+    DataFrame の作成と科目ごとの集計を1度だけ行い、
+    全体・全科目の予測をまとめて返す。
+    """
+
+    def __init__(self, study_log):
+        self.record_count = len(study_log)
+        self.df = prepare_study_data(study_log)
+        if self.df is None:
+            return
+
+        # 全体と科目ごとの総学習時間・直近7件の平均（時間）
+        self.current_total = self.df['minutes'].sum() / 60
+        self.daily_average = self.df['minutes'].tail(7).mean() / 60
+        by_subject = self.df.groupby('subject', sort=False)['minutes']
+        self.subject_totals = (by_subject.sum() / 60).to_dict()
+        self.subject_averages = (
+            self.df.groupby('subject', sort=False).tail(7)
+            .groupby('subject', sort=False)['minutes'].mean() / 60
+        ).to_dict()
+
+    @classmethod
+    def for_log(cls, study_log):
+        """学習記録の版ごとにキャッシュされたセッションを返す"""
+        if not isinstance(study_log, StudyLog):
+            return cls(study_log)
+        return study_log.cached('analytics_session', lambda: cls(study_log))
+
+    def predict_total(self, target_hours):
+        """全体の学習時間予測"""
+        if self.record_count < 5 or self.df is None:
+            return []
+        return predict_days(self.current_total, self.daily_average, target_hours)
+
+    def predict_subject(self, subject, target_hours):
+        """科目ごとの学習時間予測"""
+        if self.record_count < 5 or self.df is None:
+            return []
+        if subject not in self.subject_totals:
+            return [(h, 999999) for h in target_hours]  # データがない場合は最大値
+        return predict_days(self.subject_totals[subject],
+                            self.subject_averages[subject], target_hours)
+
+    def predict_all(self, subjects, target_hours):
+        """全体と各科目の予測をまとめて返す（キー None が全体）"""
+        predictions = {None: self.predict_total(target_hours)}
+        for subject in subjects:
+            predictions[subject] = self.predict_subject(subject, target_hours)
+        return predictions
+
 def predict_total_achievement(study_log, target_hours):
     """全体の学習時間予測"""
     if len(study_log) < 5:
         return []
-    
-    df = prepare_study_data(study_log)
-    if df is None:
-        return []
-    
-    current_total = df['minutes'].sum() / 60  # 現在の総学習時間（時間）
-    predictions = []
-    
-    # 直近7日間の平均学習時間を計算
-    recent_data = df.tail(min(len(df), 7))
-    daily_average = recent_data['minutes'].mean() / 60  # 1日あたりの平均学習時間（時間）
-    
-    for target in target_hours:
-        if current_total < target:
-            remaining_hours = target - current_total
-            days_needed = int(remaining_hours / daily_average) if daily_average > 0 else 999999
-            predictions.append((target, max(1, days_needed)))
-    
-    return predictions
+    return AnalyticsSession.for_log(study_log).predict_total(target_hours)
 
 def predict_subject_achievement(study_log, subject, target_hours):
     """科目ごとの学習時間予測"""
     if len(study_log) < 5:
         return []
-    
-    df = prepare_study_data(study_log)
-    if df is None:
-        return []
-    
-    # 特定の科目のデータのみ抽出
-    subject_df = df[df['subject'] == subject]
-    if len(subject_df) == 0:
-        return [(h, 999999) for h in target_hours]  # データがない場合は最大値
-    
-    current_total = subject_df['minutes'].sum() / 60
-    predictions = []
-    
-    # 直近のデータから1日あたりの平均学習時間を計算
-    recent_data = subject_df.tail(min(len(subject_df), 7))
-    daily_average = recent_data['minutes'].mean() / 60
-    
-    for target in target_hours:
-        if current_total < target:
-            remaining_hours = target - current_total
-            days_needed = int(remaining_hours / daily_average) if daily_average > 0 else 999999
-            predictions.append((target, max(1, days_needed)))
-    
-    return predictions
\ No newline at end of file
+    return AnalyticsSession.for_log(study_log).predict_subject(subject, target_hours)
\ No newline at end of file
@@ -16,11 +16,43 @@ GRAPH_DEFAULTS = {
 # アプリケーション設定
 APP_CONFIG = {
     "window_size": "800x900",
-    "title": "Study Level-up System"
+    "title": "Study Level-up System",
+    "prewarm_stats": True,    # 起動後にバックグラウンドで統計画面のモジュールを読み込む
+    "prewarm_delay": 2000     # ミリ秒
+}
+
+# 予測設定
+PREDICTION_CONFIG = {
+    "target_hours": [10, 20, 30, 40, 50, 100, 200, 300, 400, 500,
+                     1000, 2000, 3000, 4000, 5000, 10000]
 }
 
 # タイマー設定
 TIMER_CONFIG = {
     "update_interval": 1000,  # ミリ秒
-    "format": "%H:%M:%S"
-}
\ No newline at end of file
+    "format": "%H:%M:%S",
+    # 計測中の状態はデータファイルの隣（study_data.timer）に書き出し、異常終了時に復元する
+    "checkpoint_interval": 30  # 秒
+}
+
+# プロフィール（学習者ごとのデータ）設定
+PROFILE_CONFIG = {
+    "index_file": "profiles/index.json",  # 一覧。各学習者のデータは profiles/<名前>/ に保存
+    "default": "default"                  # 既定の学習者（従来の study_data.json を使う）
+}
+
+# ローカルサーバー（server.py）設定
+SERVER_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "history": 10000,        # クライアントへ差分で配信できる直近の変更数
+    "poll_interval": 2000    # GUIをクライアントとして使うときに他の変更を取り込む間隔（ミリ秒）
+}
+
+# データ保存設定
+STORAGE_CONFIG = {
+    "data_file": "study_data.json",
+    "backend": "journal",     # "json": 毎回全体を書き換え / "journal": 追記 + 定期圧縮 / "sqlite": SQLite
+    "compact_every": 500,     # ジャーナルをスナップショットへ圧縮するイベント数
+    "group_commit_ms": 500    # GUIでこの時間内の変更をまとめて1回で書き込む（0で毎回書き込む）
+}
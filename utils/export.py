@@ -0,0 +1,149 @@
+import csv
+import json
+import sys
+from models.study_log import day_number, MINUTES_PER_DAY
+
+FIELDS = ['id', 'studied_at', 'subject', 'minutes', 'exp']
+FORMATS = ['csv', 'jsonl', 'parquet', 'arrow']
+
+
+def filter_bounds(study_log, start=None, end=None, subjects=None):
+    """絞り込み条件を（開始分, 終了分, 科目番号の集合）に変換
+
+    start/end は 'YYYY-MM-DD'（両端を含む）、subjects は科目名の一覧。
+    指定のない条件は None。
+    """
+    first = day_number(start) * MINUTES_PER_DAY if start else None
+    last = (day_number(end) + 1) * MINUTES_PER_DAY if end else None
+    codes = None
+    if subjects is not None:
+        codes = {study_log.codes[subject] for subject in subjects if subject in study_log.codes}
+    return first, last, codes
+
+
+def select_positions(study_log, **filters):
+    """条件に合う記録の位置を記録順に返す"""
+    first, last, codes = filter_bounds(study_log, **filters)
+    times = study_log.times
+    subject_codes = study_log.subject_codes
+    for i in range(len(study_log)):
+        if first is not None and times[i] < first:
+            continue
+        if last is not None and times[i] >= last:
+            continue
+        if codes is not None and subject_codes[i] not in codes:
+            continue
+        yield i
+
+
+def iter_rows(study_log, **filters):
+    """FIELDS の順に並べた記録を1件ずつ返す"""
+    for i in select_positions(study_log, **filters):
+        record_id, minutes, subject, exp, studied_at = study_log[i]
+        yield record_id, studied_at, subject, minutes, exp
+
+
+class LineBuffer:
+    """csv.writer の出力を1行ずつ受け取る"""
+
+    def __init__(self):
+        self.text = ''
+
+    def write(self, text):
+        self.text += text
+
+    def pop(self):
+        text, self.text = self.text, ''
+        return text
+
+
+def iter_csv(study_log, **filters):
+    """CSVを1行ずつ返す（ヘッダー行を含む）"""
+    line = LineBuffer()
+    writer = csv.writer(line)
+    writer.writerow(FIELDS)
+    yield line.pop()
+    for row in iter_rows(study_log, **filters):
+        writer.writerow(row)
+        yield line.pop()
+
+
+def iter_jsonl(study_log, **filters):
+    """JSONLを1行ずつ返す"""
+    for row in iter_rows(study_log, **filters):
+        yield json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet/Arrow形式の出力には pyarrow が必要です（pip install pyarrow）")
+    return pyarrow
+
+
+def to_arrow(study_log, **filters):
+    """NumPyの列からArrowのテーブルを作成
+
+    絞り込みがない場合、ID・学習時間・EXPはコピーせずに渡す。
+    """
+    pa = require_pyarrow()
+    import numpy as np
+
+    columns = study_log.as_numpy()
+    first, last, codes = filter_bounds(study_log, **filters)
+    mask = None
+    if first is not None or last is not None or codes is not None:
+        times = columns['time'].view(np.int64)
+        mask = np.ones(len(times), dtype=bool)
+        if first is not None:
+            mask &= times >= first
+        if last is not None:
+            mask &= times < last
+        if codes is not None:
+            mask &= np.isin(columns['subject_code'], list(codes))
+
+    def column(values):
+        return values if mask is None else values[mask]
+
+    return pa.table({
+        'id': pa.array(column(columns['id'])),
+        'studied_at': pa.array(column(columns['time']).astype('datetime64[s]')),
+        'subject': pa.DictionaryArray.from_arrays(
+            pa.array(column(columns['subject_code'])), pa.array(columns['subjects'])),
+        'minutes': pa.array(column(columns['minutes'])),
+        'exp': pa.array(column(columns['exp']))
+    })
+
+
+def export_records(study_log, output=None, format='csv', **filters):
+    """学習記録を output（省略時は標準出力）へ書き出し、件数を返す
+
+    CSV/JSONLは1行ずつ書き出すため、件数が多くてもメモリ使用量は一定。
+    """
+    if format in ('parquet', 'arrow'):
+        if output is None:
+            raise ValueError(f"{format}形式は出力先のファイルを指定してください")
+        table = to_arrow(study_log, **filters)
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, output)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, output, compression='uncompressed')
+        return table.num_rows
+
+    if format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unknown export format: {format}")
+    lines = iter_csv(study_log, **filters) if format == 'csv' else iter_jsonl(study_log, **filters)
+    f = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    count = -1 if format == 'csv' else 0  # ヘッダー行は数えない
+    try:
+        for line in lines:
+            f.write(line)
+            count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return count
@@ -0,0 +1,119 @@
+import csv
+import json
+import os
+import re
+from operator import itemgetter
+from models.study_log import day_number
+from utils.config import SUBJECTS
+
+# 'YYYY-MM-DD HH:MM'（T区切りや秒付きも受け付ける）
+TIMESTAMP_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})[ T]([01]\d|2[0-3]):([0-5]\d)(:\d{2})?')
+# 改行で連結した日時をまとめて検証するためのパターン（すでに 'YYYY-MM-DD HH:MM' の形式）
+CANONICAL_LINES = re.compile(r'(?:\d{4}-\d{2}-\d{2} (?:[01]\d|2[0-3]):[0-5]\d\n)*')
+# T区切りや秒付きを含む場合に、まとめて正規化するための1行ごとのパターン
+TIMESTAMP_LINES = re.compile(f"^{TIMESTAMP_PATTERN.pattern}$", re.MULTILINE)
+
+
+class SessionError(ValueError):
+    """取り込むデータの誤り"""
+
+    def __init__(self, line, message):
+        super().__init__(f"{line}行目: {message}")
+        self.line = line
+
+
+def parse_session(line, studied_at, subject, minutes):
+    """1件分の値を検証して (日時, 科目, 学習時間) を返す"""
+    match = TIMESTAMP_PATTERN.fullmatch(str(studied_at or '').strip())
+    if match is None:
+        raise SessionError(line, f"日時は YYYY-MM-DD HH:MM の形式で指定してください: {studied_at}")
+    day, hour, minute = match.group(1, 2, 3)
+    try:
+        day_number(day)
+    except ValueError:
+        raise SessionError(line, f"存在しない日付です: {studied_at}")
+    if subject not in SUBJECTS:
+        raise SessionError(line, f"未登録の科目です: {subject}")
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        minutes = 0
+    if minutes <= 0:
+        raise SessionError(line, "学習時間は1以上の整数で指定してください")
+    return f"{day} {hour}:{minute}", subject, minutes
+
+
+def parse_columns(values):
+    """(日時, 科目, 学習時間) の文字列の一覧をまとめて検証し、parse_session() と同じ形で返す
+
+    1件ずつ正規表現を当てる代わりに、日時は改行で連結して1回で検証（必要なら正規化）し、
+    日付は種類ごとに1回だけ確かめる。誤りがあれば None を返す（行の特定は呼び出し側で行う）。
+    """
+    if not values:
+        return []
+    texts, subjects, minutes = zip(*values)
+    joined = '\n'.join(texts)
+    # 改行を含む値があると行がずれるため、まとめては検証しない
+    if joined.count('\n') != len(texts) - 1:
+        return None
+    if CANONICAL_LINES.fullmatch(joined + '\n'):
+        normalized = texts
+    else:
+        # 前後の空白・T区切り・秒を含む場合は、空白を除いてまとめて正規化する
+        joined, count = TIMESTAMP_LINES.subn(r'\1 \2:\3', '\n'.join(map(str.strip, texts)))
+        if count != len(texts):
+            return None
+        normalized = joined.split('\n')
+    try:
+        for day in {text[:10] for text in normalized}:
+            day_number(day)
+        minutes = [int(value) for value in minutes]
+    except ValueError:
+        return None
+    if min(minutes) <= 0 or not set(subjects) <= SUBJECTS.keys():
+        return None
+    return list(zip(normalized, subjects, minutes))
+
+
+def read_csv(f):
+    """studied_at, subject, minutes 列を持つCSVを読み込む（他の列は無視）"""
+    # DictReader は行ごとに辞書を作るため、見出しから列の位置だけを求めて読む
+    rows = list(csv.reader(f))
+    header = rows[0] if rows else []
+    columns = [header.index(name) if name in header else None
+               for name in ('studied_at', 'subject', 'minutes')]
+    if None not in columns:
+        get = itemgetter(*columns)
+        try:
+            sessions = parse_columns([get(row) for row in rows[1:] if row])
+        except IndexError:
+            sessions = None  # 列の足りない行がある
+        if sessions is not None:
+            return sessions
+    # 誤りのある行を特定するため、1行ずつ検証する
+    return [parse_session(line, *(row[column] if column is not None and column < len(row)
+                                  else None for column in columns))
+            for line, row in enumerate(rows[1:], 2) if row]
+
+
+def read_jsonl(f):
+    """1行1オブジェクト（studied_at, subject, minutes）のJSONLを読み込む"""
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            raise SessionError(line, "JSONとして読み込めません")
+        if not isinstance(row, dict):
+            raise SessionError(line, "オブジェクトで指定してください")
+        yield parse_session(line, row.get('studied_at'), row.get('subject'), row.get('minutes'))
+
+
+def read_sessions(path, format=None):
+    """ファイルの学習記録を検証済みのリストで返す（形式は省略時に拡張子で判定）"""
+    format = format or ('jsonl' if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson')
+                        else 'csv')
+    reader = read_jsonl if format == 'jsonl' else read_csv
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return list(reader(f))
@@ -1,27 +1,49 @@
 import tkinter as tk
-from tkinter import ttk
-import time
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from models.study_tracker import StudyTracker
-from utils.config import APP_CONFIG, SUBJECTS
+from tkinter import ttk, simpledialog
+import importlib
+import os
+import threading
+from models.profiles import ProfileIndex
+from models.session_timer import SessionTimer
+from utils.config import APP_CONFIG, SUBJECTS, TIMER_CONFIG, SERVER_CONFIG
 from .dialogs import RecordEditDialog
-from .stats.status_view import StatusView
-from .stats.subject_view import SubjectView
-from .stats.daily_view import DailyView
-from .stats.management_view import ManagementView
-from .stats.analysis_view import AnalysisView
+from .lazy_notebook import LazyNotebook
 
 class StudyApp:
-    def __init__(self, root):
+    # matplotlib・pandas などを使うビューのモジュールは、
+    # タブを初めて開いたとき（または prewarm_stats）に読み込む
+    STATS_VIEWS = [
+        ('status', 'status_view', 'StatusView', "現在のステータス"),
+        ('subject', 'subject_view', 'SubjectView', "科目別統計"),
+        ('daily', 'daily_view', 'DailyView', "日別統計"),
+        ('management', 'management_view', 'ManagementView', "記録管理"),
+        ('analysis', 'analysis_view', 'AnalysisView', "分析データ")
+    ]
+
+    def __init__(self, root, server=None):
         self.root = root
         self.root.title(APP_CONFIG["title"])
         self.root.geometry(APP_CONFIG["window_size"])
-        self.tracker = StudyTracker()
+        # server（server.py のURL）を指定した場合はそのクライアントとして動く
+        self.server = server
+        if server:
+            # 通信用のモジュールはクライアントとして動くときだけ読み込む
+            from models.remote import RemoteTracker
+            self.tracker = RemoteTracker(server)
+            self.root.after(SERVER_CONFIG["poll_interval"], self.poll_server)
+        else:
+            # 選択中の学習者のデータだけを読み込む
+            self.profiles = ProfileIndex()
+            self.profile = self.profiles.current
+            self.open_tracker()
         
         self.setup_main_interface()
         self.setup_stats_window()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        if APP_CONFIG.get("prewarm_stats"):
+            self.root.after(APP_CONFIG.get("prewarm_delay", 0), self.prewarm_stats)
+        # 前回終了しなかったタイマーがあれば復元を確認
+        self.root.after_idle(self.recover_timer)
 
     def setup_main_interface(self):
         # スタイル設定
@@ -30,6 +52,14 @@ class StudyApp:
         style.configure('Timer.TLabel', font=('Helvetica', 24))       # 2倍
         style.configure('Button.TButton', font=('Helvetica', 12))
 
+        # 学習者の選択（サーバーのクライアントとして動くときは接続先を表示）
+        profile_frame = ttk.Frame(self.root)
+        profile_frame.pack(pady=5)
+        if self.server:
+            ttk.Label(profile_frame, text=f"サーバー: {self.server}").pack(side=tk.LEFT)
+        else:
+            self.setup_profile_selector(profile_frame)
+
         # タイトル
         self.label = ttk.Label(self.root, text="勉強してレベルアップしよう！")
         self.label.pack(pady=10)
@@ -81,11 +111,13 @@ class StudyApp:
         self.status_text.pack(pady=10)
 
     def setup_timer(self):
-        self.timer_running = False
-        self.paused = False
-        self.start_time = 0
-        self.pause_time = 0
+        self.create_session_timer()
         self.timer_id = None
+        self.timer_visible = True
+
+        # 最小化中は表示を更新しない
+        self.root.bind('<Unmap>', self.on_unmap, add='+')
+        self.root.bind('<Map>', self.on_map, add='+')
         
         self.timer_label = ttk.Label(self.root, text="00:00:00", style='Timer.TLabel')
         self.timer_label.pack(pady=5)
@@ -123,44 +155,78 @@ class StudyApp:
             self.pause_button.config(state=tk.NORMAL)
 
     def start_timer(self):
-        """タイマー開始機能の修正"""
-        if self.paused:
-            self.start_time = time.time() - (self.pause_time - self.start_time)
-        else:
-            self.start_time = time.time()
-        
-        self.timer_running = True
-        self.paused = False
+        self.timer.start(self.subject_var.get())
         self.update_timer_buttons("running")
         self.update_timer()  # タイマー更新を即座に開始
 
     def pause_timer(self):
-        if self.timer_running:
-            self.pause_time = time.time()
-            self.paused = True
-            self.timer_running = False
-            if self.timer_id:
-                self.root.after_cancel(self.timer_id)
+        if self.timer.running:
+            self.timer.pause()
+            self.cancel_timer_update()
+            self.show_elapsed()
             self.update_timer_buttons("paused")
 
     def stop_timer(self):
-        if self.timer_running or self.paused:
-            self.timer_running = False
-            self.paused = False
-            if self.timer_id:
-                self.root.after_cancel(self.timer_id)
-            elapsed_minutes = int((time.time() - self.start_time) / 60)
+        if self.timer.running or self.timer.paused:
+            self.cancel_timer_update()
+            # 一時停止していた時間は含めない
+            elapsed_minutes = int(self.timer.stop() // 60)
             self.minutes_var.set(elapsed_minutes)
             self.update_timer_buttons("ready")
 
     def reset_timer(self):
-        self.timer_running = False
-        self.paused = False
-        if self.timer_id:
-            self.root.after_cancel(self.timer_id)
+        self.cancel_timer_update()
+        self.timer.reset()
         self.timer_label.config(text="00:00:00")
         self.update_timer_buttons("ready")
 
+    def create_session_timer(self):
+        # 計測中の状態は学習者ごとにデータファイルの隣へ書き出す
+        self.timer = SessionTimer(
+            os.path.splitext(self.tracker.data_file)[0] + '.timer',
+            TIMER_CONFIG["checkpoint_interval"])
+
+    def cancel_timer_update(self):
+        if self.timer_id:
+            self.root.after_cancel(self.timer_id)
+            self.timer_id = None
+
+    def show_elapsed(self):
+        elapsed = int(self.timer.elapsed())
+        hours = elapsed // 3600
+        minutes = (elapsed % 3600) // 60
+        seconds = elapsed % 60
+        self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+
+    def on_unmap(self, event):
+        if event.widget is self.root:
+            self.timer_visible = False
+
+    def on_map(self, event):
+        if event.widget is self.root and not self.timer_visible:
+            self.timer_visible = True
+            if self.timer.running:
+                self.cancel_timer_update()
+                self.update_timer()
+
+    def recover_timer(self):
+        state = self.timer.load_checkpoint()
+        if state is None:
+            return
+        elapsed = int(state['elapsed'])
+        subject = state.get('subject') or "科目未選択"
+        if tk.messagebox.askyesno(
+                "タイマーの復元",
+                f"前回終了しなかったタイマーがあります（{subject}、{elapsed // 60}分{elapsed % 60}秒）。\n"
+                "一時停止の状態で復元しますか？"):
+            self.timer.restore(state)
+            if state.get('subject') in SUBJECTS:
+                self.subject_var.set(state['subject'])
+            self.show_elapsed()
+            self.update_timer_buttons("paused")
+        else:
+            self.timer.reset()
+
     def get_button_command(self, btn_text):
         if btn_text == "チケットを使う":
             return self.confirm_use_ticket
@@ -171,7 +237,12 @@ class StudyApp:
 
     def confirm_use_ticket(self):
         if tk.messagebox.askyesno("確認", "チケットを使用しますか？"):
-            if self.tracker.use_ticket():
+            try:
+                used = self.tracker.use_ticket()
+            except self.tracker.request_errors as e:
+                tk.messagebox.showerror("エラー", f"チケットを使えませんでした。\n{e}")
+                return
+            if used:
                 self.status_text.insert(tk.END, 
                     f"チケットを使ったよ！楽しんでね！（残り: {self.tracker.tickets}）\n")
             else:
@@ -180,13 +251,22 @@ class StudyApp:
 
     def setup_stats_window(self):
         """統計ウィンドウの設定"""
-        self.stats_views = [
-            ('status', StatusView, "現在のステータス"),
-            ('subject', SubjectView, "科目別統計"),
-            ('daily', DailyView, "日別統計"),
-            ('management', ManagementView, "記録管理"),
-            ('analysis', AnalysisView, "分析データ")
-        ]
+        self.stats_views = list(self.STATS_VIEWS)
+
+    @staticmethod
+    def load_stats_view(module_name, class_name):
+        module = importlib.import_module(f".stats.{module_name}", __package__)
+        return getattr(module, class_name)
+
+    def prewarm_stats(self):
+        """統計画面のモジュールをバックグラウンドで先に読み込んでおく"""
+        def load_all():
+            for view_id, module_name, class_name, tab_name in self.stats_views:
+                try:
+                    self.load_stats_view(module_name, class_name)
+                except ImportError:
+                    pass  # タブを開いたときにエラーを表示する
+        threading.Thread(target=load_all, daemon=True).start()
 
     def show_stats(self):
         """統計ウィンドウの表示"""
@@ -194,58 +274,125 @@ class StudyApp:
         stats_window.title("ステータスの確認")
         stats_window.geometry("900x800")
 
-        notebook = ttk.Notebook(stats_window)
+        notebook = LazyNotebook(stats_window)
         notebook.pack(expand=True, fill='both', padx=5, pady=5)
 
-        # 各タブの作成
-        for view_id, view_class, tab_name in self.stats_views:
-            frame = ttk.Frame(notebook)
-            frame.pack(expand=True, fill='both')
-            view = view_class(frame, self.tracker)
-            notebook.add(frame, text=tab_name)
+        # 各タブの作成（中身は初めて選択されたときに作成）
+        for view_id, module_name, class_name, tab_name in self.stats_views:
+            notebook.add_lazy(
+                tab_name,
+                lambda frame, module_name=module_name, class_name=class_name:
+                    self.load_stats_view(module_name, class_name)(frame, self.tracker)
+            )
 
         # ウィンドウの設定
         stats_window.transient(self.root)
         stats_window.grab_set()
 
     def on_closing(self):
-        if self.timer_running:
+        if self.timer.running:
             self.stop_timer()
-        self.tracker.save_data()
+        self.close_tracker()
         self.root.destroy()
 
+    # 学習者（プロフィール）関連のメソッド
+    def setup_profile_selector(self, frame):
+        ttk.Label(frame, text="学習者:").pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar(value=self.profile)
+        self.profile_box = ttk.Combobox(
+            frame, textvariable=self.profile_var, state="readonly",
+            values=self.profiles.names()
+        )
+        self.profile_box.pack(side=tk.LEFT, padx=5)
+        self.profile_box.bind("<<ComboboxSelected>>", lambda event: self.switch_profile())
+        ttk.Button(frame, text="学習者を追加",
+                  command=self.add_profile).pack(side=tk.LEFT, padx=5)
+
+    def open_tracker(self):
+        self.tracker = self.profiles.open(self.profile)
+        # 短時間の連続した変更はまとめて書き込む（終了時にも書き込む）
+        self.tracker.schedule_flush = lambda ms: self.root.after(ms, self.tracker.flush)
+
+    def close_tracker(self):
+        if self.server:
+            return  # 保存はサーバー側で行う
+        self.tracker.save_data()
+        self.tracker.flush()
+        self.profiles.update_summary(self.profile, self.tracker)
+
+    def poll_server(self):
+        """他のクライアントの変更を定期的に取り込む（失敗しても次回に再試行）"""
+        try:
+            self.tracker.refresh()
+        except self.tracker.request_errors:
+            pass
+        self.root.after(SERVER_CONFIG["poll_interval"], self.poll_server)
+
+    def switch_profile(self):
+        name = self.profile_var.get()
+        if name == self.profile:
+            return
+        if self.timer.running or self.timer.paused:
+            tk.messagebox.showwarning(
+                "確認", "タイマーを終了またはリセットしてから学習者を切り替えてください")
+            self.profile_var.set(self.profile)
+            return
+        self.close_tracker()
+        self.profile = name
+        self.open_tracker()
+        self.create_session_timer()
+        self.timer_label.config(text="00:00:00")
+        self.update_timer_buttons("ready")
+        self.status_text.insert(tk.END,
+            f"{name}に切り替えました（レベル: {self.tracker.level}, "
+            f"EXP: {self.tracker.exp:.1f}, チケット: {self.tracker.tickets}）\n")
+        self.recover_timer()
+
+    def add_profile(self):
+        name = simpledialog.askstring("学習者を追加", "名前:", parent=self.root)
+        if not name:
+            return
+        try:
+            self.profiles.create(name)
+        except ValueError:
+            tk.messagebox.showerror("エラー", "同じ名前の学習者がいるか、名前が空です")
+            return
+        self.profile_box.configure(values=self.profiles.names())
+        self.profile_var.set(name.strip())
+        self.switch_profile()
+
     # タイマー関連のメソッド
     def update_timer(self):
-        """タイマー更新機能の修正"""
-        if self.timer_running:
-            current_time = time.time()
-            elapsed_time = int(current_time - self.start_time)
-            hours = elapsed_time // 3600
-            minutes = (elapsed_time % 3600) // 60
-            seconds = elapsed_time % 60
-            self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-            self.timer_id = self.root.after(1000, self.update_timer)
+        """表示を更新し、次に秒が切り替わる時点で再び呼ぶ
+
+        最小化中は表示を更新せず、状態の書き出しだけを行う。
+        """
+        self.timer_id = None
+        if not self.timer.running:
+            return
+        self.timer.checkpoint()
+        if self.timer_visible:
+            self.show_elapsed()
+            delay = self.timer.next_tick()
+        else:
+            delay = self.timer.checkpoint_interval * 1000
+        self.timer_id = self.root.after(delay, self.update_timer)
 
     # 勉強記録関連のメソッド
     def add_study(self):
         minutes = self.minutes_var.get()
         subject = self.subject_var.get()
         difficulty = SUBJECTS[subject]["difficulty"]
-        earned_exp = self.tracker.add_study(minutes, subject, difficulty)
+        try:
+            earned_exp = self.tracker.add_study(minutes, subject, difficulty)
+        except self.tracker.request_errors as e:
+            tk.messagebox.showerror(
+                "エラー", f"{subject}の{minutes}分を記録できませんでした。\n{e}")
+            return
         
         self.status_text.insert(tk.END, 
             f"{subject}を{minutes}分勉強！ EXP +{earned_exp:.1f}\n"
             f"現在のレベル: {self.tracker.level}, "
             f"EXP: {self.tracker.exp:.1f}, "
             f"チケット: {self.tracker.tickets}\n"
-        )
-
-    def use_ticket(self):
-        if self.tracker.use_ticket():
-            self.status_text.insert(tk.END, 
-                f"チケットを使ったよ！楽しんでね！（残り: {self.tracker.tickets}）\n"
-            )
-        else:
-            self.status_text.insert(tk.END, 
-                "チケットが足りないよ！もっと勉強して稼ごう！\n"
-            )
\ No newline at end of file
+        )
\ No newline at end of file
@@ -0,0 +1,88 @@
+import queue
+import threading
+from tkinter import ttk
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image, ImageTk
+from .figures import FIGURES
+
+
+class ChartRenderer:
+    """グラフの作成とラスタライズをワーカースレッドで行う
+
+    Figureの作成・描画（Aggバックエンド）はすべて1本のワーカースレッドで
+    順番に行い、出来上がったRGBA画像（Pillow）だけをTkのスレッドが after() で
+    受け取ってPhotoImageに転送する。描画中もタイマー表示などは止まらない。
+    """
+
+    POLL_INTERVAL = 30  # ミリ秒
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+        self.worker = None
+
+    def render(self, master, draw):
+        """draw() が返すFigureを描画して表示するラベルを返す
+
+        draw はワーカースレッドで呼ばれるため、Tkや保存先には触れず
+        引数で受け取ったデータだけを使うこと。
+        """
+        label = ttk.Label(master, text="グラフを描画中...")
+        self.submit(self.rasterize, draw, label)
+        self.pending += 1
+        if self.pending == 1:
+            root = label.nametowidget('.')
+            root.after(self.POLL_INTERVAL, self.poll, root)
+        return label
+
+    def submit(self, *job):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.run, daemon=True)
+            self.worker.start()
+        self.jobs.put(job)
+
+    def run(self):
+        while True:
+            func, *args = self.jobs.get()
+            func(*args)
+
+    def rasterize(self, draw, label):
+        """ワーカースレッド側: Figureを作成してRGBA画像にする"""
+        try:
+            fig = draw()
+            canvas = FigureCanvasAgg(fig)
+            canvas.draw()
+            # Figureは次の描画で再利用されるため、バッファを複製して渡す
+            width, height = canvas.get_width_height(physical=True)
+            image = Image.frombuffer('RGBA', (width, height), canvas.buffer_rgba(),
+                                     'raw', 'RGBA', 0, 1).copy()
+            self.results.put((label, fig, image, None))
+        except Exception as e:
+            self.results.put((label, None, None, e))
+
+    def poll(self, root):
+        """Tkスレッド側: 描画済みの画像をラベルに表示"""
+        while True:
+            try:
+                label, fig, image, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if not label.winfo_exists():
+                if fig is not None:
+                    self.submit(FIGURES.release, fig)
+                continue
+            if error is not None:
+                label.configure(text=f"グラフの描画に失敗しました: {error}")
+                continue
+            photo = ImageTk.PhotoImage(image, master=label)
+            label.configure(image=photo, text='')
+            label.image = photo  # 参照を保持してGCを防ぐ
+            # 表示を閉じたらFigureの解放もワーカースレッドで行う
+            label.bind('<Destroy>', lambda event, fig=fig: self.submit(FIGURES.release, fig), add='+')
+        if self.pending > 0:
+            root.after(self.POLL_INTERVAL, self.poll, root)
+
+
+RENDERER = ChartRenderer()
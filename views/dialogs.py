@@ -11,10 +11,7 @@ class RecordEditDialog(tk.Toplevel):
         self.result = False
         
         # 現在の記録を取得
-        self.record = next(
-            (log for log in tracker.study_log if log[0] == record_id), 
-            None
-        )
+        self.record = tracker.find_record(record_id)
         
         if self.record is None:
             messagebox.showerror("エラー", "指定されたIDの記録が見つかりません")
@@ -47,7 +44,12 @@ class RecordEditDialog(tk.Toplevel):
             subject = self.subject_var.get()
             difficulty = SUBJECTS[subject]["difficulty"]
             
-            self.tracker.modify_record(self.record_id, minutes, subject, difficulty)
+            try:
+                self.tracker.modify_record(self.record_id, minutes, subject, difficulty)
+            except self.tracker.request_errors as e:
+                # 入力した値を残したまま、再試行できるようにダイアログは閉じない
+                messagebox.showerror("エラー", f"記録を修正できませんでした。\n{e}", parent=self)
+                return
             self.result = True
             self.destroy()
             messagebox.showinfo("完了", "記録を修正しました")
\ No newline at end of file
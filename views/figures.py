@@ -0,0 +1,59 @@
+import threading
+from matplotlib.figure import Figure
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+class FigureManager:
+    """pyplotを介さずにグラフのFigureを作成・再利用する
+
+    Figureはキーごとに1つだけ作り、統計ウィンドウを開き直したときは
+    同じ軸を消去して描き直す。表示先のウィジェットが破棄されたら
+    キャンバスを切り離して描画内容を解放する。
+    Tkのスレッドとグラフ描画のワーカースレッドの両方から使うため、lock で排他する。
+    """
+
+    def __init__(self):
+        self.figures = {}
+        self.lock = threading.RLock()
+
+    def axes(self, key, figsize, create, dpi=100):
+        """key のFigureと軸のリストを返す
+
+        初回は create(fig) で軸を作成し、2回目以降は既存の軸を消去して返す。
+        """
+        with self.lock:
+            entry = self.figures.get(key)
+            if entry is None:
+                fig = Figure(figsize=figsize, dpi=dpi)
+                entry = self.figures[key] = (fig, list(create(fig)))
+            else:
+                self.clear(*entry)
+            return entry
+
+    def clear(self, fig, axes):
+        # カラーバーなど描画時に追加された軸は、元の軸を消去する前に取り除く
+        for ax in fig.axes:
+            if ax not in axes:
+                ax.remove()
+        for ax in axes:
+            ax.cla()
+
+    def attach(self, fig, master):
+        """Figureを描画してTkウィジェットとして返す"""
+        canvas = FigureCanvasTkAgg(fig, master=master)
+        canvas.draw()
+        widget = canvas.get_tk_widget()
+        widget.bind('<Destroy>', lambda event: self.release(fig), add='+')
+        return widget
+
+    def release(self, fig):
+        """描画内容を消去し、破棄されたTkキャンバスへの参照を外す"""
+        with self.lock:
+            for entry in self.figures.values():
+                if entry[0] is fig:
+                    self.clear(*entry)
+            FigureCanvasBase(fig)
+
+
+FIGURES = FigureManager()
@@ -0,0 +1,45 @@
+from tkinter import ttk
+
+
+class LazyNotebook(ttk.Notebook):
+    """タブが初めて選択されたときに中身を作成するNotebook"""
+
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.builders = {}
+        self.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+    def add_lazy(self, text, build):
+        """build(frame) で中身を作成するタブを追加"""
+        frame = ttk.Frame(self)
+        placeholder = ttk.Label(frame, text="読み込み中...")
+        placeholder.pack(pady=20)
+        self.builders[str(frame)] = (build, placeholder)
+        self.add(frame, text=text)
+        return frame
+
+    def on_tab_changed(self, event):
+        self.build_tab(self.select())
+
+    def build_tab(self, tab):
+        entry = self.builders.pop(tab, None)
+        if entry is None:
+            return
+        build, placeholder = entry
+        frame = placeholder.master
+        # プレースホルダーを表示してから作成に入る
+        placeholder.configure(text="読み込み中...")
+        self.update_idletasks()
+        try:
+            build(frame)
+        except Exception as e:
+            # 作りかけの中身を消してエラーを表示し、再試行（または次に選択したとき）に作り直す
+            for child in frame.winfo_children():
+                if child is not placeholder:
+                    child.destroy()
+            placeholder.configure(text=f"読み込みに失敗しました: {e}")
+            self.builders[tab] = entry
+            ttk.Button(frame, text="再試行",
+                       command=lambda: self.build_tab(tab)).pack(pady=5)
+            return
+        placeholder.destroy()
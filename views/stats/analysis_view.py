@@ -1,22 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.dates import AutoDateLocator, DateFormatter, DayLocator, WeekdayLocator, MonthLocator
+import matplotlib
+from matplotlib.dates import DateFormatter, DayLocator, WeekdayLocator, MonthLocator
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
 import numpy as np
-from utils.analytics import (
-    prepare_study_data,
-    create_prediction_model,
-    predict_achievement_dates,
-    predict_total_achievement,
-    predict_subject_achievement
-)
-from utils.config import SUBJECTS
+from utils.analytics import time_histograms, downsample_trend, AnalyticsSession
+from utils.config import SUBJECTS, PREDICTION_CONFIG
+from ..lazy_notebook import LazyNotebook
+from ..figures import FIGURES
+from ..chart_renderer import RENDERER
 
 class AnalysisView:
     TAB_NAME = "分析データ"
+    # downsample_trend() でまとめた単位ごとのグラフタイトル用の表記
+    TREND_LABELS = {'day': 'daily', 'week': 'weekly', 'month': 'monthly', 'year': 'yearly'}
 
     def __init__(self, parent, tracker):
         """初期化"""
@@ -30,48 +28,40 @@ class AnalysisView:
         self.main_frame.pack(expand=True, fill='both')
 
         # サブタブ用のNotebook
-        self.sub_notebook = ttk.Notebook(self.main_frame)
+        self.sub_notebook = LazyNotebook(self.main_frame)
         self.sub_notebook.pack(expand=True, fill='both')
 
-        # 各サブタブのフレーム作成
-        self.progress_frame = ttk.Frame(self.sub_notebook)
-        self.time_frame = ttk.Frame(self.sub_notebook)
-        self.prediction_frame = ttk.Frame(self.sub_notebook)
-
-        # サブタブの追加
-        self.sub_notebook.add(self.progress_frame, text='Learning Progress')
-        self.sub_notebook.add(self.time_frame, text='Time Analysis')
-        self.sub_notebook.add(self.prediction_frame, text='Time Prediction')
-
-        # 各サブタブの内容を作成
-        self.create_progress_graph(self.progress_frame)
-        self.create_time_analysis(self.time_frame)
-        self.create_time_prediction(self.prediction_frame)
+        # サブタブの追加（内容は初めて選択されたときに作成）
+        self.progress_frame = self.sub_notebook.add_lazy(
+            'Learning Progress', self.create_progress_graph)
+        self.time_frame = self.sub_notebook.add_lazy(
+            'Time Analysis', self.create_time_analysis)
+        self.prediction_frame = self.sub_notebook.add_lazy(
+            'Time Prediction', self.create_time_prediction)
 
     def create_progress_graph(self, frame):
         if not self.tracker.study_log:
             ttk.Label(frame, text="データがありません").pack(pady=10)
             return
 
-        # データフレームの作成
-        df = pd.DataFrame([
-            {
-                'date': datetime.strptime(log[4], '%Y-%m-%d %H:%M'),
-                'exp': log[3]
-            } for log in self.tracker.study_log
-        ])
+        # 表示する直近の集計だけを取得し、グラフの作成と描画はワーカースレッドで行う
+        rollups = self.tracker.rollups
+        daily_data = rollups.last('days', 7)
+        weekly_data = rollups.last('weeks', 8)
+        monthly_data = rollups.last('months', 12)
+        RENDERER.render(frame, lambda: self.draw_progress_graph(
+            daily_data, weekly_data, monthly_data)).pack(pady=10)
 
-        # 日付インデックスの設定
-        df.set_index('date', inplace=True)
-        df.sort_index(inplace=True)
+        # 説明ボタン
+        ttk.Button(frame, text="グラフの説明",
+                  command=self.show_progress_explanation).pack(pady=5)
 
-        # 日次・週次・月次データの準備
-        daily_data = df.resample('D')['exp'].sum()
-        weekly_data = df.resample('W')['exp'].sum()
-        monthly_data = df.resample('M')['exp'].sum()
+    def draw_progress_graph(self, daily_data, weekly_data, monthly_data):
+        """日次・週次・月次それぞれ（日付のリスト, EXPのリスト）からグラフを作成"""
 
-        fig = plt.figure(figsize=(12, 10), dpi=100)  # DPIを上げて解像度を向上
-        gs = fig.add_gridspec(3, 1, hspace=0.4)
+        # DPIを上げて解像度を向上
+        fig, (ax1, ax2, ax3) = FIGURES.axes(
+            'progress', (12, 10), self.create_progress_axes, dpi=100)
 
         # グラフのスタイル設定 (共通)
         bar_width = 0.7  # 棒の幅
@@ -79,71 +69,69 @@ class AnalysisView:
         linewidth = 0.5      # 枠線の太さ
 
         # 日次グラフ (直近7日)
-        ax1 = fig.add_subplot(gs[0])
-        if len(daily_data) > 0:
-            start_date = daily_data.index[-1] - timedelta(days=6)
-            ax1.bar(daily_data.index[-7:], daily_data.values[-7:],  # barに変更
+        dates, values = daily_data
+        if len(dates) > 0:
+            start_date = dates[-1] - timedelta(days=6)
+            ax1.bar(dates, values,  # barに変更
                     color='#e74c3c',  # より鮮やかな赤色
                     width=bar_width, edgecolor=edgecolor, linewidth=linewidth,
                     label='Daily EXP')
-            ax1.set_xlim(start_date, daily_data.index[-1])
+            ax1.set_xlim(start_date, dates[-1])
             ax1.xaxis.set_major_locator(DayLocator())
             ax1.xaxis.set_major_formatter(DateFormatter('%Y-%m-%d'))
 
         ax1.set_title('Daily EXP Progress (Last 7 Days)', pad=15, fontweight='bold') # タイトルを太字に
         ax1.set_xlabel('Date', fontweight='bold')
         ax1.set_ylabel('EXP Gained', fontweight='bold')
-        plt.setp(ax1.get_xticklabels(), rotation=45)
+        ax1.tick_params(axis='x', labelrotation=45)
         ax1.grid(True, alpha=0.3, linestyle='--')  # グリッドを点線に
         ax1.legend()
 
         # 週次グラフ (直近8週)
-        ax2 = fig.add_subplot(gs[1])
-        if len(weekly_data) > 0:
-            start_date = weekly_data.index[-1] - timedelta(weeks=7)
-            ax2.bar(weekly_data.index[-8:], weekly_data.values[-8:],  # barに変更
+        dates, values = weekly_data
+        if len(dates) > 0:
+            start_date = dates[-1] - timedelta(weeks=7)
+            ax2.bar(dates, values,  # barに変更
                     color='#2ecc71',  # より鮮やかな緑色
                     width=bar_width, edgecolor=edgecolor, linewidth=linewidth,
                     label='Weekly EXP')
-            ax2.set_xlim(start_date, weekly_data.index[-1])
+            ax2.set_xlim(start_date, dates[-1])
             ax2.xaxis.set_major_locator(WeekdayLocator(byweekday=0))
             ax2.xaxis.set_major_formatter(DateFormatter('%Y-W%U'))
 
         ax2.set_title('Weekly EXP Progress (Last 8 Weeks)', pad=15, fontweight='bold')
         ax2.set_xlabel('Week', fontweight='bold')
         ax2.set_ylabel('EXP Gained', fontweight='bold')
-        plt.setp(ax2.get_xticklabels(), rotation=45)
+        ax2.tick_params(axis='x', labelrotation=45)
         ax2.grid(True, alpha=0.3, linestyle='--')
         ax2.legend()
 
 
         # 月次グラフ (直近12か月)
-        ax3 = fig.add_subplot(gs[2])
-        if len(monthly_data) > 0:
-            start_date = monthly_data.index[-1] - pd.DateOffset(months=11)
-            ax3.bar(monthly_data.index[-12:], monthly_data.values[-12:],  # barに変更
+        dates, values = monthly_data
+        if len(dates) > 0:
+            start_date = dates[-1] - pd.DateOffset(months=11)
+            ax3.bar(dates, values,  # barに変更
                     color='#3498db', # より鮮やかな青色
                     width=bar_width*1.2, edgecolor=edgecolor, linewidth=linewidth,  # 月次グラフは棒を少し太く
                     label='Monthly EXP')
-            ax3.set_xlim(start_date, monthly_data.index[-1])
+            ax3.set_xlim(start_date, dates[-1])
             ax3.xaxis.set_major_locator(MonthLocator())
             ax3.xaxis.set_major_formatter(DateFormatter('%Y-%m'))
 
         ax3.set_title('Monthly EXP Progress (Last 12 Months)', pad=15, fontweight='bold')
         ax3.set_xlabel('Month', fontweight='bold')
         ax3.set_ylabel('EXP Gained', fontweight='bold')
-        plt.setp(ax3.get_xticklabels(), rotation=45)
+        ax3.tick_params(axis='x', labelrotation=45)
         ax3.grid(True, alpha=0.3, linestyle='--')
         ax3.legend()
 
-        plt.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(pady=10)
+        fig.tight_layout()
+        return fig
 
-        # 説明ボタン
-        ttk.Button(frame, text="グラフの説明",
-                  command=self.show_progress_explanation).pack(pady=5)
+    def create_progress_axes(self, fig):
+        gs = fig.add_gridspec(3, 1, hspace=0.4)
+        return [fig.add_subplot(gs[i]) for i in range(3)]
 
     def show_progress_explanation(self):
         messagebox.showinfo("グラフの説明",
@@ -163,54 +151,48 @@ class AnalysisView:
             ttk.Label(frame, text="No data available").pack(pady=10)
             return
 
-        fig = plt.figure(figsize=(12, 8))
-        gs = fig.add_gridspec(2, 2, height_ratios=[1, 1.2])
+        # 集計とグラフの作成・描画はワーカースレッドで行う
+        columns = self.tracker.time_columns()
+        RENDERER.render(frame, lambda: self.draw_time_analysis(columns)).pack(pady=10)
+
+        # 説明ボタンの追加
+        ttk.Button(frame, text="グラフの説明",
+                  command=self.show_time_analysis_explanation).pack(pady=5)
+
+    def draw_time_analysis(self, columns):
+        fig, (ax1, ax2, ax3, ax4) = FIGURES.axes(
+            'time_analysis', (12, 11), self.create_time_analysis_axes)
+        histograms = time_histograms(columns)
 
         # 時間帯別学習時間（グラデーションカラー）
-        ax1 = fig.add_subplot(gs[0, 0])
-        self.plot_hourly_distribution(ax1)
+        self.plot_hourly_distribution(ax1, histograms['hourly'])
 
         # 曜日別学習時間（虹色パレット）
-        ax2 = fig.add_subplot(gs[0, 1])
-        self.plot_weekday_distribution(ax2)
-
-        # 学習時間推移（2色グラデーション）
-        ax3 = fig.add_subplot(gs[1, :])
-        self.plot_study_time_trend(ax3)
+        self.plot_weekday_distribution(ax2, histograms['weekday'])
 
-        plt.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(pady=10)
+        # 曜日×時間帯のヒートマップ
+        self.plot_weekday_hour_heatmap(ax3, histograms['heatmap'])
 
-        # 説明ボタンの追加
-        ttk.Button(frame, text="グラフの説明",
-                  command=self.show_time_analysis_explanation).pack(pady=5)
+        # 学習時間推移（2色グラデーション）
+        self.plot_study_time_trend(ax4, columns)
 
-    def plot_hourly_distribution(self, ax):
-        hours = [datetime.strptime(log[4], '%Y-%m-%d %H:%M').hour
-                 for log in self.tracker.study_log]
-        minutes = [log[1] for log in self.tracker.study_log]
+        fig.tight_layout()
+        return fig
 
-        hour_stats = {h: 0 for h in range(24)}
-        for h, m in zip(hours, minutes):
-            hour_stats[h] += m
+    def create_time_analysis_axes(self, fig):
+        gs = fig.add_gridspec(3, 2, height_ratios=[1, 1, 1.2])
+        return [fig.add_subplot(gs[0, 0]), fig.add_subplot(gs[0, 1]),
+                fig.add_subplot(gs[1, :]), fig.add_subplot(gs[2, :])]
 
-        colors = plt.cm.viridis(np.linspace(0, 1, 24))
-        ax.bar(hour_stats.keys(), hour_stats.values(), color=colors)
+    def plot_hourly_distribution(self, ax, hour_stats):
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, 24))
+        ax.bar(range(24), hour_stats, color=colors)
         ax.set_title('Study Time by Hour', fontsize=12, pad=10)
         ax.set_xlabel('Hour of Day')
         ax.set_ylabel('Total Minutes')
 
-    def plot_weekday_distribution(self, ax):
+    def plot_weekday_distribution(self, ax, weekday_stats):
         weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        dates = [datetime.strptime(log[4], '%Y-%m-%d %H:%M')
-                 for log in self.tracker.study_log]
-        minutes = [log[1] for log in self.tracker.study_log]
-
-        weekday_stats = {i: 0 for i in range(7)}
-        for d, m in zip(dates, minutes):
-            weekday_stats[d.weekday()] += m
 
         colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99',
                  '#ff99cc', '#99ffcc', '#ff99ff']
@@ -219,22 +201,42 @@ class AnalysisView:
         ax.set_xlabel('Weekday')
         ax.set_ylabel('Total Minutes')
 
-    def plot_study_time_trend(self, ax):
-        dates = [datetime.strptime(log[4], '%Y-%m-%d %H:%M')
-                 for log in self.tracker.study_log]
-        minutes = [log[1] for log in self.tracker.study_log]
+    def plot_weekday_hour_heatmap(self, ax, heatmap):
+        weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+        image = ax.imshow(heatmap, aspect='auto', cmap='YlOrRd')
+        ax.figure.colorbar(image, ax=ax, label='Total Minutes')
+        ax.set_yticks(range(7), weekdays)
+        ax.set_xticks(range(24))
+        ax.set_title('Study Time by Weekday and Hour', fontsize=12, pad=10)
+        ax.set_xlabel('Hour of Day')
+        ax.set_ylabel('Weekday')
+
+    def plot_study_time_trend(self, ax, columns):
+        # 軸の幅（ピクセル）の半分を上限に、多すぎる記録は日・週・月単位にまとめる
+        max_points = max(50, int(ax.get_window_extent().width // 2))
+        trend = downsample_trend(columns, max_points)
+        dates = trend['time']
+        minutes = trend['mean']
 
         colors = np.zeros((len(dates), 4))
         colors[:, 0] = np.linspace(0.2, 0.8, len(dates))  # Red channel
         colors[:, 2] = np.linspace(0.8, 0.2, len(dates))  # Blue channel
         colors[:, 3] = 1  # Alpha channel
 
+        if trend['unit'] != 'session':
+            # まとめた期間内の最小〜最大を帯で表示
+            ax.fill_between(dates, trend['min'], trend['max'],
+                            color='#95a5a6', alpha=0.3, linewidth=0)
         ax.scatter(dates, minutes, c=colors)
         ax.plot(dates, minutes, color='#2c3e50', alpha=0.5)
-        ax.set_title('Study Time Trend', fontsize=12, pad=10)
+        title = 'Study Time Trend'
+        if trend['unit'] != 'session':
+            title += f" ({self.TREND_LABELS[trend['unit']]} average, min-max band)"
+        ax.set_title(title, fontsize=12, pad=10)
         ax.set_xlabel('Date')
         ax.set_ylabel('Minutes per Session')
-        plt.setp(ax.get_xticklabels(), rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
 
 
     def show_time_analysis_explanation(self):
@@ -246,6 +248,9 @@ class AnalysisView:
             "曜日別学習時間（レインボー）:\n"
             "- 曜日ごとの総学習時間を表示\n"
             "- 学習パターンの週間リズムを確認できます\n\n"
+            "曜日×時間帯ヒートマップ:\n"
+            "- 曜日と時間帯の組み合わせごとの総学習時間を色で表示\n"
+            "- 「何曜日の何時に学習しているか」を一目で確認できます\n\n"
             "学習時間推移（グラデーション）:\n"
             "- 日付順の学習時間の変化を表示\n"
             "- 学習時間の増減傾向を可視化します")
@@ -256,8 +261,7 @@ class AnalysisView:
             return
 
         # 目標時間の設定
-        target_hours = [10, 20, 30, 40, 50, 100, 200, 300, 400, 500,
-                       1000, 2000, 3000, 4000, 5000, 10000]
+        target_hours = PREDICTION_CONFIG["target_hours"]
 
         # モデルの説明
         model_desc = (
@@ -281,10 +285,13 @@ class AnalysisView:
         # モデル説明の追加
         text_widget.insert(tk.END, model_desc)
 
+        # 全体・科目別の予測をまとめて計算
+        predictions = AnalyticsSession.for_log(self.tracker.study_log).predict_all(
+            SUBJECTS.keys(), target_hours)
+
         # 全体の予測
         text_widget.insert(tk.END, "【全データ】\n")
-        total_predictions = predict_total_achievement(self.tracker.study_log, target_hours)
-        for target, days in total_predictions:
+        for target, days in predictions[None]:
             years, months, remain_days = self.convert_days(days)
             text_widget.insert(tk.END,
                 f"{target}時間到達まで: 約{days}日 （{years}年{months}か月{remain_days}日）\n")
@@ -292,9 +299,7 @@ class AnalysisView:
         # 科目別の予測
         for subject in SUBJECTS.keys():
             text_widget.insert(tk.END, f"\n【{subject}】\n")
-            subject_predictions = predict_subject_achievement(
-                self.tracker.study_log, subject, target_hours)
-            for target, days in subject_predictions:
+            for target, days in predictions[subject]:
                 years, months, remain_days = self.convert_days(days)
                 text_widget.insert(tk.END,
                     f"{target}時間到達まで: 約{days}日 （{years}年{months}か月{remain_days}日）\n")
@@ -1,49 +1,141 @@
 import tkinter as tk
-from tkinter import ttk
-from datetime import datetime
+from tkinter import ttk, messagebox
+import numpy as np
+from models.study_log import day_number, MINUTES_PER_DAY
+from models.events import RECORD_EVENTS, RecordModified
+from utils.config import SUBJECTS
 
 class DailyView:
     TAB_NAME = "日別統計"
-    
+    VISIBLE_ROWS = 25  # 一度に作成する行数
+    ALL_SUBJECTS = "すべての科目"
+
     def __init__(self, parent, tracker):
         self.parent = parent
         self.tracker = tracker
+        self.offset = 0
         self.setup_view()
-    
+        # 記録が変わったら表示中の行だけを更新（タブを閉じたら購読解除）
+        unsubscribe = tracker.events.subscribe(RECORD_EVENTS, self.on_records_changed)
+        parent.bind('<Destroy>', lambda event: unsubscribe(), add='+')
+
     def setup_view(self):
-        # スクロール可能なテキストウィジェット
-        self.text_widget = tk.Text(self.parent, height=20, width=50)
-        scrollbar = ttk.Scrollbar(self.parent, orient="vertical", 
-                                command=self.text_widget.yview)
-        self.text_widget.configure(yscrollcommand=scrollbar.set)
-        
-        self.text_widget.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # 絞り込み・日付ジャンプ
+        control_frame = ttk.Frame(self.parent)
+        control_frame.pack(fill="x", padx=5, pady=5)
+
+        ttk.Label(control_frame, text="科目:").pack(side=tk.LEFT)
+        self.subject_var = tk.StringVar(value=self.ALL_SUBJECTS)
+        subject_box = ttk.Combobox(
+            control_frame, textvariable=self.subject_var, state="readonly",
+            values=[self.ALL_SUBJECTS, *SUBJECTS.keys()]
+        )
+        subject_box.pack(side=tk.LEFT, padx=5)
+        subject_box.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
+
+        self.date_var = tk.StringVar()
+        ttk.Entry(control_frame, textvariable=self.date_var, width=12).pack(side=tk.RIGHT)
+        ttk.Button(control_frame, text="日付へ移動",
+                  command=self.jump_to_date).pack(side=tk.RIGHT, padx=5)
+
+        self.count_label = ttk.Label(self.parent)
+        self.count_label.pack(anchor="w", padx=5)
+
+        # 表示中の行だけを作成するリスト
+        list_frame = ttk.Frame(self.parent)
+        list_frame.pack(expand=True, fill="both")
+
+        headers = [("id", "記録", 60), ("date", "日時", 140), ("subject", "科目", 220),
+                   ("minutes", "時間（分）", 80), ("exp", "獲得EXP", 80)]
+        self.tree = ttk.Treeview(list_frame, columns=[h[0] for h in headers],
+                                 show="headings", height=self.VISIBLE_ROWS)
+        for column, text, width in headers:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="center")
+
+        self.scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # マウスホイール（Windows/macOS と Linux）
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_to(
+            self.offset - (1 if e.delta > 0 else -1) * 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
 
         self.show_daily_stats()
-    
+
     def show_daily_stats(self):
-        self.text_widget.insert(tk.END, "学習記録:\n\n")
-        
-        # 日付の新しい順にソート
-        sorted_logs = sorted(
-            self.tracker.study_log,
-            key=lambda x: (
-                datetime.strptime(x[4], '%Y-%m-%d %H:%M'),
-                -x[0]  # 同じ日時の場合はIDの大きい順
-            ),
-            reverse=True
-        )
-        
-        for log in sorted_logs:
-            record_id, minutes, subject, exp, date = log
-            self.text_widget.insert(tk.END, (
-                f"記録 #{record_id}\n"
-                f"日時: {date}\n"
-                f"科目: {subject}\n"
-                f"時間: {minutes}分\n"
-                f"獲得EXP: {exp:.1f}\n"
-                f"------------------------\n"
-            ))
-        
-        self.text_widget.configure(state='disabled')
\ No newline at end of file
+        self.apply_filter()
+
+    def apply_filter(self):
+        """科目で絞り込んだ表示順を作り直して先頭を表示"""
+        self.update_order()
+        self.scroll_to(0)
+
+    def on_records_changed(self, event):
+        if isinstance(event, RecordModified) and (
+                event.old[2] == event.new[2] or self.subject_var.get() == self.ALL_SUBJECTS):
+            # 並び順は変わらないので、表示中なら該当の1行だけを書き換える
+            position = self.tracker.study_log.position(event.new[0])
+            if position is not None and self.tree.exists(str(position)):
+                self.tree.item(str(position), values=self.row_values(event.new))
+            return
+        # 件数・並び順が変わる場合も、作り直すのは表示中の行だけ
+        self.update_order()
+        self.scroll_to(self.offset)
+
+    def update_order(self):
+        """科目で絞り込んだ表示順（新しい順）を作り直す"""
+        order = self.tracker.newest_first()
+        subject = self.subject_var.get()
+        if subject != self.ALL_SUBJECTS:
+            columns = self.tracker.time_columns()
+            if subject in columns['subjects']:
+                code = columns['subjects'].index(subject)
+                order = order[columns['subject_code'][order] == code]
+            else:
+                order = order[:0]
+        self.order = order
+
+    def jump_to_date(self):
+        """指定日（またはそれ以前で最も近い日）の記録まで移動"""
+        try:
+            day_end = (day_number(self.date_var.get().strip()) + 1) * MINUTES_PER_DAY
+        except ValueError:
+            messagebox.showerror("エラー", "日付は YYYY-MM-DD の形式で入力してください")
+            return
+        # 表示順は新しい順なので符号を反転して二分探索
+        times = self.tracker.time_columns()['time'].view(np.int64)[self.order]
+        self.scroll_to(int(np.searchsorted(-times, -day_end, side='right')))
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.order)))
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.VISIBLE_ROWS)
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def row_values(self, record):
+        record_id, minutes, subject, exp, date = record
+        return (f"#{record_id}", date, subject, minutes, f"{exp:.1f}")
+
+    def scroll_to(self, offset):
+        """offset 件目から表示中の行だけを作成"""
+        total = len(self.order)
+        self.offset = max(0, min(offset, total - self.VISIBLE_ROWS))
+        end = min(self.offset + self.VISIBLE_ROWS, total)
+
+        self.tree.delete(*self.tree.get_children())
+        study_log = self.tracker.study_log
+        # 行のIDは記録の位置（古いデータでは記録IDが重複していることがある）
+        for i in self.order[self.offset:end]:
+            self.tree.insert("", tk.END, iid=str(i), values=self.row_values(study_log[i]))
+
+        if total:
+            self.scrollbar.set(self.offset / total, end / total)
+            self.count_label.configure(text=f"学習記録: 全{total}件中 {self.offset + 1}〜{end}件")
+        else:
+            self.scrollbar.set(0, 1)
+            self.count_label.configure(text="学習記録: 0件")
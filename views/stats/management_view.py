@@ -46,14 +46,22 @@ class ManagementView:
     
     def confirm_reset_all(self):
         if messagebox.askyesno("確認", "全ての記録をリセットしますか？"):
-            self.tracker.reset_all()
+            try:
+                self.tracker.reset_all()
+            except self.tracker.request_errors as e:
+                messagebox.showerror("エラー", f"記録をリセットできませんでした。\n{e}")
+                return
             messagebox.showinfo("完了", "全ての記録をリセットしました")
     
     def reset_selected_day(self):
         selected_date = self.cal.get_date()
         if messagebox.askyesno("確認", 
                              f"{selected_date}の記録をリセットしますか？"):
-            self.tracker.reset_day(selected_date)
+            try:
+                self.tracker.reset_day(selected_date)
+            except self.tracker.request_errors as e:
+                messagebox.showerror("エラー", f"記録をリセットできませんでした。\n{e}")
+                return
             messagebox.showinfo("完了", "指定日の記録をリセットしました")
     
     def edit_record(self):
@@ -63,5 +71,9 @@ class ManagementView:
     def delete_record(self):
         record_id = self.edit_id_var.get()
         if messagebox.askyesno("確認", f"記録 #{record_id} を削除しますか？"):
-            self.tracker.delete_record(record_id)
+            try:
+                self.tracker.delete_record(record_id)
+            except self.tracker.request_errors as e:
+                messagebox.showerror("エラー", f"記録を削除できませんでした。\n{e}")
+                return
             messagebox.showinfo("完了", "記録を削除しました")
\ No newline at end of file
@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
+from models.level_curve import LEVEL_CURVE
+from models.events import RECORD_EVENTS, TicketUsed
 
 class StatusView:
     TAB_NAME = "現在のステータス"
@@ -8,15 +10,26 @@ class StatusView:
         self.parent = parent
         self.tracker = tracker
         self.setup_view()
+        # 記録やチケットが変わったら表示を更新（タブを閉じたら購読解除）
+        unsubscribe = tracker.events.subscribe(
+            RECORD_EVENTS + (TicketUsed,), lambda event: self.update_labels())
+        parent.bind('<Destroy>', lambda event: unsubscribe(), add='+')
     
     def setup_view(self):
         # フォントサイズを大きくする
         large_font = ('Helvetica', 16)  # 16ポイントに設定
         
+        self.labels = [
+            ttk.Label(self.parent, font=large_font) for _ in range(5)
+        ]
+        for label in self.labels:
+            label.pack(pady=10)
+        self.update_labels()
+
+    def update_labels(self):
         # 総計の計算
-        total_exp = sum(log[3] for log in self.tracker.study_log)
-        total_time = sum(log[1] for log in self.tracker.study_log)
-        next_level_exp = 100 * (self.tracker.level ** 1.5)
+        total_time, total_exp = self.tracker.totals()
+        next_level_exp = LEVEL_CURVE.required_exp(self.tracker.level)
         exp_needed = next_level_exp - self.tracker.exp
         
         # ステータス情報（フォントサイズを大きく）
@@ -28,9 +41,5 @@ class StatusView:
             f"残チケット数: {self.tracker.tickets}枚"
         ]
         
-        for text in info_texts:
-            ttk.Label(
-                self.parent, 
-                text=text,
-                font=large_font
-            ).pack(pady=10)
\ No newline at end of file
+        for label, text in zip(self.labels, info_texts):
+            label.configure(text=text)
\ No newline at end of file
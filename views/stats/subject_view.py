@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from utils.config import SUBJECTS
+from models.events import RECORD_EVENTS, affected_subjects
+from ..figures import FIGURES
 
 class SubjectView:
     TAB_NAME = "科目別統計"
@@ -11,6 +11,9 @@ class SubjectView:
         self.parent = parent
         self.tracker = tracker
         self.setup_view()
+        # 記録が変わったら該当する科目の行と棒だけを更新（タブを閉じたら購読解除）
+        unsubscribe = tracker.events.subscribe(RECORD_EVENTS, self.on_records_changed)
+        parent.bind('<Destroy>', lambda event: unsubscribe(), add='+')
     
     def setup_view(self):
         # 科目ごとの統計を計算
@@ -23,11 +26,9 @@ class SubjectView:
         for subject in SUBJECTS.keys():
             stats[subject] = {'time': 0, 'exp': 0}
         
-        for log in self.tracker.study_log:
-            subject = log[2]
+        for subject, totals in self.tracker.subject_totals().items():
             if subject in stats:
-                stats[subject]['time'] += log[1]
-                stats[subject]['exp'] += log[3]
+                stats[subject] = totals
         
         return stats
     
@@ -42,16 +43,18 @@ class SubjectView:
             ttk.Label(table_frame, text=header).grid(row=0, column=col, padx=5, pady=5)
         
         # データ行
+        self.value_labels = {}
         for row, (subject, data) in enumerate(stats.items(), 1):
             ttk.Label(table_frame, text=SUBJECTS[subject]['name_en']).grid(
                 row=row, column=0, padx=5, pady=2)
-            ttk.Label(table_frame, text=f"{data['time']}").grid(
-                row=row, column=1, padx=5, pady=2)
-            ttk.Label(table_frame, text=f"{data['exp']:.1f}").grid(
-                row=row, column=2, padx=5, pady=2)
+            time_label = ttk.Label(table_frame, text=f"{data['time']}")
+            time_label.grid(row=row, column=1, padx=5, pady=2)
+            exp_label = ttk.Label(table_frame, text=f"{data['exp']:.1f}")
+            exp_label.grid(row=row, column=2, padx=5, pady=2)
+            self.value_labels[subject] = (time_label, exp_label)
     
     def show_stats_graphs(self, stats):
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 8))
+        fig, (ax1, ax2) = FIGURES.axes('subject', (8, 8), lambda fig: fig.subplots(2, 1))
         
         subjects = list(stats.keys())
         times = [stats[s]['time'] for s in subjects]
@@ -60,18 +63,39 @@ class SubjectView:
         labels = [SUBJECTS[s]['name_en'] for s in subjects]
         
         # 学習時間グラフ
-        ax1.bar(labels, times, color=colors)
+        self.time_bars = dict(zip(subjects, ax1.bar(labels, times, color=colors)))
         ax1.set_title('Study Time by Subject')
         ax1.set_ylabel('Time (minutes)')
-        plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
+        ax1.tick_params(axis='x', labelrotation=45)
         
         # EXPグラフ
-        ax2.bar(labels, exps, color=colors)
+        self.exp_bars = dict(zip(subjects, ax2.bar(labels, exps, color=colors)))
         ax2.set_title('EXP Gained by Subject')
         ax2.set_ylabel('EXP')
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45)
+        ax2.tick_params(axis='x', labelrotation=45)
         
-        plt.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=self.parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(pady=10)
\ No newline at end of file
+        fig.tight_layout()
+        self.fig = fig
+        self.axes = (ax1, ax2)
+        FIGURES.attach(fig, self.parent).pack(pady=10)
+
+    def on_records_changed(self, event):
+        subjects = affected_subjects(event)
+        if subjects is None:
+            subjects = set(SUBJECTS)
+        subjects &= self.value_labels.keys()
+        if not subjects:
+            return
+        # 科目別の集計は記録の変更時に更新済みなので、変わった科目の値を差し替えるだけ
+        totals = self.tracker.subject_totals()
+        for subject in subjects:
+            data = totals.get(subject, {'time': 0, 'exp': 0})
+            time_label, exp_label = self.value_labels[subject]
+            time_label.configure(text=f"{data['time']}")
+            exp_label.configure(text=f"{data['exp']:.1f}")
+            self.time_bars[subject].set_height(data['time'])
+            self.exp_bars[subject].set_height(data['exp'])
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+        self.fig.canvas.draw_idle()
\ No newline at end of file